@@ -7,6 +7,7 @@ from flask import Flask, render_template
 from flask_cors import CORS
 import logging
 from blueprints.public import public_bp
+from utils.profiling import init_profiling
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,6 +21,9 @@ def create_app():
     # Initialize CORS
     CORS(app)
     
+    # Opt-in request profiling (no-op unless PROFILING_ENABLED)
+    init_profiling(app)
+    
     # Register blueprint
     app.register_blueprint(public_bp)
     
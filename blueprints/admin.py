@@ -3,9 +3,15 @@ Admin Blueprint
 Handles all admin dashboard routes and functionality
 """
 
-from flask import Blueprint, render_template, jsonify, current_app
-from utils.prometheus import query_prometheus, query_prometheus_range
+from flask import Blueprint, render_template, jsonify, current_app, request
+from utils.panels import query_panels, DEFAULT_DURATION, DEFAULT_STEP
 from utils.system import get_system_info
+from utils.collector import init_host_collector, get_host_state, get_host_details
+from utils.processes import init_processes, get_process_state, get_top_processes
+from utils.timeseries import init_timeseries, local_query, local_query_range
+from utils.alerts import init_alerts, get_alert_state
+from utils.fleet import get_fleet_summary
+from utils.connectivity import init_connectivity, get_connectivity_state
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,24 +19,31 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 admin_bp = Blueprint('admin', __name__)
 
+@admin_bp.record_once
+def _init_background(state):
+    """Start local metric sampling, alerting and connectivity probes when the blueprint is registered"""
+    init_timeseries(state.app)
+    init_host_collector(state.app)
+    init_processes(state.app)
+    init_alerts(state.app)
+    init_connectivity(state.app)
+
 @admin_bp.route('/')
 def dashboard():
     """Main admin dashboard view"""
     system_info = get_system_info()
-    return render_template('pages/admin.html', system=system_info)
+    return render_template(
+        'pages/admin.html',
+        system=system_info,
+        fleet_enabled=bool(current_app.config['FLEET_NODES'])
+    )
 
 @admin_bp.route('/metrics')
 def get_metrics():
     """API endpoint for fetching current metrics"""
     try:
-        metrics = {
-            'system': get_system_info(),
-            'cpu': _get_cpu_metrics(),
-            'memory': _get_memory_metrics(),
-            'storage': _get_storage_metrics(),
-            'network': _get_network_metrics(),
-            'services': _get_service_status()
-        }
+        metrics = {'system': get_system_info(), 'host': get_host_state() or get_host_details()}
+        metrics.update(_get_panel_metrics(current_app.config['ADMIN_PANELS']))
         return jsonify({'status': 'success', 'data': metrics})
     except Exception as e:
         logger.error(f"Error fetching metrics: {e}")
@@ -40,139 +53,183 @@ def get_metrics():
 def service_status():
     """Get status of all services"""
     try:
-        services = _get_service_status()
+        panels = [p for p in current_app.config['ADMIN_PANELS'] if p['kind'] == 'services']
+        services = _get_panel_metrics(panels).get('services', {})
         return jsonify({'status': 'success', 'services': services})
     except Exception as e:
         logger.error(f"Error checking services: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-def _get_cpu_metrics():
-    """Get CPU metrics from Prometheus"""
+@admin_bp.route('/host')
+def host_details():
+    """Per-interface, per-disk and per-mount statistics"""
     try:
-        query = '100 - (avg(rate(node_cpu_seconds_total{mode="idle"}[5m])) * 100)'
-        data = query_prometheus_range(query)
-        
-        if data and data.get('result'):
-            result = data['result'][0] if data['result'] else {}
-            values = result.get('values', [])
-            
-            # Extract just the values for the chart
-            chart_data = [float(v[1]) for v in values[-20:]]  # Last 20 points
-            current_value = chart_data[-1] if chart_data else 0
-            
-            return {
-                'current': round(current_value, 1),
-                'chart_data': chart_data
-            }
+        return jsonify({'status': 'success', 'data': get_host_state() or get_host_details()})
     except Exception as e:
-        logger.error(f"Error getting CPU metrics: {e}")
-    
-    return {'current': 0, 'chart_data': []}
+        logger.error(f"Error collecting host details: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
-def _get_memory_metrics():
-    """Get memory metrics from Prometheus"""
+@admin_bp.route('/processes')
+def top_processes():
+    """Top processes by CPU, memory and I/O"""
     try:
-        query = '(1 - (node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes)) * 100'
-        data = query_prometheus_range(query)
-        
-        if data and data.get('result'):
-            result = data['result'][0] if data['result'] else {}
-            values = result.get('values', [])
-            
-            chart_data = [float(v[1]) for v in values[-20:]]
-            current_value = chart_data[-1] if chart_data else 0
-            
-            return {
-                'current': round(current_value, 1),
-                'chart_data': chart_data
-            }
+        top_n = current_app.config['PROCESS_TOP_N']
+        limit = max(1, min(request.args.get('limit', top_n, type=int), top_n))
+        processes = get_process_state(limit) or get_top_processes(
+            limit=limit,
+            min_interval=current_app.config['PROCESS_SAMPLE_INTERVAL']
+        )
+        return jsonify({'status': 'success', 'data': processes})
     except Exception as e:
-        logger.error(f"Error getting memory metrics: {e}")
-    
-    return {'current': 0, 'chart_data': []}
+        logger.error(f"Error sampling processes: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
-def _get_storage_metrics():
-    """Get storage metrics from Prometheus"""
+@admin_bp.route('/alerts')
+def alerts():
+    """Currently firing alerts"""
     try:
-        query = '(1 - (node_filesystem_avail_bytes{fstype!="tmpfs"} / node_filesystem_size_bytes{fstype!="tmpfs"})) * 100'
-        data = query_prometheus(query)
-        
-        if data and data.get('result'):
-            result = data['result'][0] if data['result'] else {}
-            value = float(result.get('value', [0, 0])[1])
-            
-            return {
-                'current': round(value, 1),
-                'used': value,
-                'free': 100 - value
-            }
+        return jsonify({'status': 'success', 'data': get_alert_state()})
     except Exception as e:
-        logger.error(f"Error getting storage metrics: {e}")
-    
-    return {'current': 0, 'used': 0, 'free': 100}
+        logger.error(f"Error reading alert state: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
-def _get_network_metrics():
-    """Get network traffic metrics"""
+@admin_bp.route('/connectivity')
+def connectivity():
+    """Latest server-side probe results with latency percentiles"""
     try:
-        query = 'rate(node_network_receive_bytes_total{device!="lo"}[5m]) + rate(node_network_transmit_bytes_total{device!="lo"}[5m])'
-        data = query_prometheus_range(query)
-        
-        if data and data.get('result'):
-            result = data['result'][0] if data['result'] else {}
-            values = result.get('values', [])
-            
-            # Convert to MB/s
-            chart_data = [float(v[1]) / 1024 / 1024 for v in values[-20:]]
-            current_value = chart_data[-1] if chart_data else 0
-            
-            return {
-                'current': round(current_value, 2),
-                'chart_data': chart_data,
-                'unit': 'MB/s'
-            }
+        return jsonify({'status': 'success', 'data': get_connectivity_state()})
     except Exception as e:
-        logger.error(f"Error getting network metrics: {e}")
-    
-    return {'current': 0, 'chart_data': [], 'unit': 'MB/s'}
-
-def _get_service_status():
-    """Check status of various services"""
-    services = {
-        'amnezia': False,
-        'grafana': False,
-        'prometheus': False,
-        'portainer': False,
-        'telegram': False,
-        'librechat': False,
-        'n8n': False
-    }
-    
+        logger.error(f"Error reading connectivity state: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@admin_bp.route('/fleet')
+def fleet():
+    """Per-node summary across the fleet"""
+    if not current_app.config['FLEET_NODES']:
+        return jsonify({'status': 'error', 'message': 'Fleet view is not configured'}), 404
     try:
-        # Check Prometheus directly
-        query = 'up'
-        data = query_prometheus(query)
-        
-        if data and data.get('result'):
-            for result in data['result']:
-                job = result.get('metric', {}).get('job', '')
-                value = float(result.get('value', [0, 0])[1])
-                
-                # Map job names to services
-                if 'prometheus' in job:
-                    services['prometheus'] = value == 1
-                elif 'grafana' in job:
-                    services['grafana'] = value == 1
-                # Add more mappings as needed
-        
-        # For now, assume other services are online if Prometheus is working
-        if services['prometheus']:
-            services['amnezia'] = True
-            services['portainer'] = True
-            services['telegram'] = True
-            services['librechat'] = True
-            services['n8n'] = True
-            
+        summary = get_fleet_summary(
+            current_app.config['FLEET_PANELS'],
+            current_app.config['FLEET_NODES'],
+            timeout=current_app.config['FLEET_NODE_TIMEOUT']
+        )
+        return jsonify({'status': 'success', 'data': summary})
     except Exception as e:
-        logger.error(f"Error checking service status: {e}")
-    
+        logger.error(f"Error building fleet summary: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def _get_panel_metrics(panels):
+    """
+    Fetch and shape data for the configured dashboard panels
+
+    Args:
+        panels: List of panel dicts from ADMIN_PANELS
+
+    Returns:
+        dict: Panel name to panel payload
+    """
+    results = query_panels(panels)
+    metrics = {}
+    for panel in panels:
+        builder = PANEL_BUILDERS[panel['kind']]
+        try:
+            metrics[panel['name']] = builder(panel, _with_local_fallback(panel, results.get(panel['name'])))
+        except Exception as e:
+            logger.error(f"Error building {panel['name']} panel: {e}")
+            metrics[panel['name']] = builder(panel, None)
+    return metrics
+
+def _with_local_fallback(panel, data):
+    """Use the local time-series store when Prometheus returned nothing"""
+    if data and data.get('result'):
+        return data
+
+    field = panel.get('local_field')
+    if not field:
+        return data
+
+    if panel.get('range'):
+        local = local_query_range(
+            field, panel.get('duration', DEFAULT_DURATION), panel.get('step', DEFAULT_STEP)
+        )
+    else:
+        local = local_query(field)
+    return local or data
+
+def _series_panel(panel, data):
+    """Range panel: current value plus the last 20 points for the chart"""
+    scale = panel.get('scale', 1)
+    precision = panel.get('precision', 1)
+    metrics = {'current': 0, 'chart_data': []}
+    if 'unit' in panel:
+        metrics['unit'] = panel['unit']
+
+    if data and data.get('result'):
+        values = data['result'][0].get('values', [])
+        chart_data = [float(v[1]) * scale for v in values[-20:]]
+        metrics['chart_data'] = chart_data
+        metrics['current'] = round(chart_data[-1], precision) if chart_data else 0
+
+    return metrics
+
+def _gauge_panel(panel, data):
+    """
+    Instant percentage panel: current, used and free
+
+    With one series per mountpoint (filesystem queries) every mount is
+    listed and the headline value is the root filesystem, or the fullest
+    mount if / is not among them.
+    """
+    if data and data.get('result'):
+        precision = panel.get('precision', 1)
+        mounts = []
+        for result in data['result']:
+            mountpoint = result.get('metric', {}).get('mountpoint')
+            if mountpoint is not None:
+                value = float(result.get('value', [0, 0])[1])
+                mounts.append({'mountpoint': mountpoint, 'percent': round(value, precision)})
+
+        if mounts:
+            root = next((m for m in mounts if m['mountpoint'] == '/'), None)
+            value = root['percent'] if root else max(m['percent'] for m in mounts)
+        else:
+            value = float(data['result'][0].get('value', [0, 0])[1])
+
+        metrics = {
+            'current': round(value, precision),
+            'used': value,
+            'free': 100 - value
+        }
+        if mounts:
+            metrics['mounts'] = mounts
+        return metrics
+
+    return {'current': 0, 'used': 0, 'free': 100}
+
+def _services_panel(panel, data):
+    """Map the Prometheus `up` series onto dashboard service lights"""
+    jobs = panel.get('jobs', {})
+    implied = panel.get('implied', [])
+    services = {name: False for name in list(jobs.values()) + implied}
+
+    if data and data.get('result'):
+        for result in data['result']:
+            job = result.get('metric', {}).get('job', '')
+            value = float(result.get('value', [0, 0])[1])
+            for pattern, service in jobs.items():
+                if pattern in job:
+                    services[service] = value == 1
+                    break
+
+    # For now, assume other services are online if Prometheus is working
+    if services.get('prometheus'):
+        for service in implied:
+            services[service] = True
+
     return services
+
+PANEL_BUILDERS = {
+    'series': _series_panel,
+    'gauge': _gauge_panel,
+    'services': _services_panel
+}
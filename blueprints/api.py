@@ -7,6 +7,8 @@ from flask import Blueprint, jsonify, request, current_app
 from datetime import datetime
 from utils.prometheus import query_prometheus, query_prometheus_range
 from utils.system import get_system_info
+from utils.telegram import send_telegram_message
+from utils.profiling import span
 import requests
 import time
 import random
@@ -59,7 +61,8 @@ def prometheus_proxy(path):
             prom_url += '?' + request.query_string.decode()
         
         # Make request to Prometheus
-        response = requests.get(prom_url, timeout=10)
+        with span('prometheus.proxy', path):
+            response = requests.get(prom_url, timeout=10)
         
         return response.json(), response.status_code, {
             'Content-Type': 'application/json',
@@ -95,20 +98,7 @@ def test_prometheus():
 def telegram_test():
     """Send test message to Telegram bot"""
     try:
-        # Read Telegram secrets
-        with open(current_app.config['TELEGRAM_BOT_TOKEN_FILE'], 'r') as f:
-            bot_token = f.read().strip()
-        with open(current_app.config['TELEGRAM_USER_ID_FILE'], 'r') as f:
-            chat_id = f.read().strip()
-        
-        # Send test message
-        telegram_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        telegram_data = {
-            'chat_id': chat_id,
-            'text': '🔷 Test message from Blue Djedi Admin Dashboard'
-        }
-        
-        response = requests.post(telegram_url, json=telegram_data, timeout=10)
+        response = send_telegram_message('🔷 Test message from Blue Djedi Admin Dashboard')
         
         if response.status_code == 200:
             return jsonify({
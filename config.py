@@ -47,6 +47,131 @@ class BaseConfig:
     GRAFANA_URL = 'http://vps-grafana:3000'
     PORTAINER_URL = 'http://portainer:9000'
     TRAEFIK_URL = 'http://traefik:8080'
+    
+    # Admin dashboard panels, batched into as few Prometheus requests as
+    # possible. 'range' panels sharing duration/step share one query_range
+    # and all instant panels share one query.
+    ADMIN_PANELS = [
+        {
+            'name': 'cpu',
+            'kind': 'series',
+            'range': True,
+            'query': '100 - (avg(rate(node_cpu_seconds_total{mode="idle"}[5m])) * 100)',
+            'local_field': 'cpu_percent'
+        },
+        {
+            'name': 'memory',
+            'kind': 'series',
+            'range': True,
+            'query': '(1 - (node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes)) * 100',
+            'local_field': 'memory_percent'
+        },
+        {
+            'name': 'network',
+            'kind': 'series',
+            'range': True,
+            'query': 'rate(node_network_receive_bytes_total{device!="lo"}[5m]) + rate(node_network_transmit_bytes_total{device!="lo"}[5m])',
+            'local_field': 'net_bytes_per_sec',
+            'scale': 1 / 1024 / 1024,
+            'precision': 2,
+            'unit': 'MB/s'
+        },
+        {
+            'name': 'storage',
+            'kind': 'gauge',
+            'query': '(1 - (node_filesystem_avail_bytes{fstype!="tmpfs"} / node_filesystem_size_bytes{fstype!="tmpfs"})) * 100',
+            'local_field': 'disk_percent'
+        },
+        {
+            'name': 'services',
+            'kind': 'services',
+            'query': 'up',
+            # Prometheus job name substring -> service id
+            'jobs': {'prometheus': 'prometheus', 'grafana': 'grafana'},
+            # Services assumed online whenever Prometheus is up
+            'implied': ['amnezia', 'portainer', 'telegram', 'librechat', 'n8n']
+        }
+    ]
+    
+    # Fleet view: Prometheus series grouped by instance plus /api/system
+    # snapshots from other nodes running this app, fetched concurrently
+    FLEET_NODES = [
+        # {'name': 'vps-1', 'url': 'https://admin.example.com', 'instance': '10.0.0.1:9100'}
+    ]
+    FLEET_NODE_TIMEOUT = 3  # seconds for the whole fleet request
+    FLEET_PANELS = [
+        {'name': 'up', 'query': 'max by (instance) (up{job=~".*node.*"})'},
+        {'name': 'cpu', 'query': '100 - (avg by (instance) (rate(node_cpu_seconds_total{mode="idle"}[5m])) * 100)'},
+        {'name': 'memory', 'query': 'max by (instance) ((1 - (node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes)) * 100)'},
+        {'name': 'disk', 'query': 'max by (instance) ((1 - (node_filesystem_avail_bytes{fstype!="tmpfs"} / node_filesystem_size_bytes{fstype!="tmpfs"})) * 100)'},
+        {
+            'name': 'network',
+            'query': 'sum by (instance) (rate(node_network_receive_bytes_total{device!="lo"}[5m]) + rate(node_network_transmit_bytes_total{device!="lo"}[5m]))',
+            'scale': 1 / 1024 / 1024,
+            'precision': 2
+        }
+    ]
+    
+    # Per-interface/disk/mount rates, sampled in the background worker
+    HOST_SAMPLING_ENABLED = True
+    HOST_SAMPLE_INTERVAL = 5  # seconds between samples
+    
+    # Top-processes panel
+    PROCESS_TOP_N = 10  # entries per list, and the most a request may ask for
+    PROCESS_SAMPLING_ENABLED = True  # sample in the background worker
+    PROCESS_SAMPLE_INTERVAL = 2  # seconds between samples
+    
+    # Alerting, evaluated against local samples in the sampler worker.
+    # Metrics are the local time-series fields plus 'up:<job>' from Prometheus.
+    ALERTS_ENABLED = True
+    ALERT_GROUP_WAIT = 30  # seconds to collect events into one message
+    ALERT_REPEAT_INTERVAL = 4 * 3600  # re-send still-firing alerts
+    ALERT_SERVICE_CHECK_INTERVAL = 60
+    ALERT_RULES = [
+        {'name': 'High CPU', 'metric': 'cpu_percent', 'op': '>', 'threshold': 90, 'clear': 80, 'for': 300},
+        {'name': 'High memory', 'metric': 'memory_percent', 'op': '>', 'threshold': 90, 'clear': 85, 'for': 300},
+        {'name': 'Disk almost full', 'metric': 'disk_percent', 'op': '>', 'threshold': 85, 'clear': 80},
+        {'name': 'Prometheus down', 'metric': 'up:prometheus', 'op': '<', 'threshold': 1, 'for': 120, 'severity': 'critical'}
+    ]
+    
+    # Server-side connectivity checks for the service links, probed on
+    # one schedule and served from DATA_DIR/connectivity.json
+    CONNECTIVITY_ENABLED = True
+    CONNECTIVITY_INTERVAL = 15  # seconds between probe rounds
+    CONNECTIVITY_TIMEOUT = 3  # seconds per phase
+    CONNECTIVITY_WINDOW = 240  # probes kept per target for percentiles
+    CONNECTIVITY_VERIFY_TLS = True
+    CONNECTIVITY_TARGETS = [
+        {'name': 'traefik', 'url': TRAEFIK_URL},
+        {'name': 'grafana', 'url': GRAFANA_URL},
+        {'name': 'portainer', 'url': PORTAINER_URL},
+        {'name': 'prometheus', 'url': PROMETHEUS_URL + '/-/healthy'}
+    ]
+    
+    # Persistent data (local metric history, leader locks)
+    DATA_DIR = os.getenv('VPS_DATA_DIR', '/app/data')
+    
+    # Short-lived state shared between workers; tmpfs so frequent rewrites
+    # never reach the persistent disk
+    RUNTIME_DIR = os.getenv('VPS_RUNTIME_DIR', '/dev/shm/vps-web')
+    
+    # Request profiling (opt-in): span timing, Server-Timing headers, slow
+    # request logs and ?profile=1 stack capture on admin routes
+    PROFILING_ENABLED = os.getenv('VPS_PROFILING', '0') == '1'
+    PROFILING_SLOW_MS = 500
+    PROFILING_SAMPLE_SLOW = False  # sample every request, keep slow ones
+    PROFILING_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+    PROFILING_DIR = os.path.join(DATA_DIR, 'profiles')
+    
+    # Local time-series store, used when Prometheus is unavailable
+    TIMESERIES_ENABLED = True
+    TIMESERIES_DIR = os.path.join(DATA_DIR, 'timeseries')
+    TIMESERIES_SAMPLE_INTERVAL = 10  # seconds
+    TIMESERIES_FLUSH_SAMPLES = 6  # samples per on-disk block
+    TIMESERIES_SEGMENT_SECONDS = 3600
+    TIMESERIES_RETENTION_SECONDS = 7 * 86400
+    TIMESERIES_DOWNSAMPLE_AFTER = 86400
+    TIMESERIES_DOWNSAMPLE_STEP = 300
 
 class DevelopmentConfig(BaseConfig):
     """Development configuration"""
@@ -65,4 +190,9 @@ class TestingConfig(BaseConfig):
     TESTING = True
     DEBUG = True
     WTF_CSRF_ENABLED = False
+    TIMESERIES_ENABLED = False
+    ALERTS_ENABLED = False
+    HOST_SAMPLING_ENABLED = False
+    PROCESS_SAMPLING_ENABLED = False
+    CONNECTIVITY_ENABLED = False
 #EOF
\ No newline at end of file
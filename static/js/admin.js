@@ -19,9 +19,15 @@ document.addEventListener('DOMContentLoaded', function() {
     // Set up auto-refresh every 30 seconds
     setInterval(refreshMetrics, 30000);
     
-    // Check tunnel status
-    checkTunnelStatus();
-    setInterval(checkTunnelStatus, 10000);
+    // Service connectivity (probed server-side)
+    refreshConnectivity();
+    setInterval(refreshConnectivity, 15000);
+    
+    // Fleet summary, only rendered when FLEET_NODES is configured
+    if (document.getElementById('fleet-table')) {
+        refreshFleet();
+        setInterval(refreshFleet, 60000);
+    }
 });
 
 // Refresh all metrics
@@ -41,6 +47,8 @@ async function refreshMetrics() {
         if (data.status === 'success') {
             updateDashboard(data.data);
         }
+        
+        refreshProcesses();
     } catch (error) {
         console.error('Failed to refresh metrics:', error);
     } finally {
@@ -100,6 +108,89 @@ function updateDashboard(data) {
     }
 }
 
+// Refresh top processes table
+async function refreshProcesses() {
+    try {
+        const response = await fetch('/admin/processes?limit=10');
+        const data = await response.json();
+        
+        if (data.status === 'success') {
+            updateProcessTable(data.data.cpu);
+        }
+    } catch (error) {
+        console.error('Failed to refresh processes:', error);
+    }
+}
+
+// Render top processes by CPU
+function updateProcessTable(processes) {
+    const table = document.getElementById('process-table');
+    if (!table) return;
+    
+    table.replaceChildren(...processes.map(proc => {
+        const row = document.createElement('tr');
+        const cells = [
+            proc.pid,
+            proc.name,
+            `${proc.cpu_percent.toFixed(1)}%`,
+            window.utils.formatBytes(proc.rss, 1),
+            `${window.utils.formatBytes(Math.round(proc.io_bytes_per_sec), 1)}/s`
+        ];
+        cells.forEach((value, index) => {
+            const cell = document.createElement('td');
+            cell.className = index < 2 ? 'py-1 pr-4' : 'py-1 pr-4 text-right';
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        return row;
+    }));
+}
+
+// Fetch the per-node fleet summary
+async function refreshFleet() {
+    try {
+        const response = await fetch('/admin/fleet');
+        const data = await response.json();
+        
+        if (data.status === 'success') {
+            updateFleetTable(data.data.nodes);
+        }
+    } catch (error) {
+        console.error('Failed to refresh fleet:', error);
+    }
+}
+
+// Render one row per node
+function updateFleetTable(nodes) {
+    const table = document.getElementById('fleet-table');
+    if (!table) return;
+    
+    const percent = value => value === null || value === undefined ? '-' : `${Number(value).toFixed(1)}%`;
+    
+    table.replaceChildren(...nodes.map(node => {
+        const row = document.createElement('tr');
+        const cells = [
+            node.name,
+            node.up ? 'UP' : (node.error ? `DOWN (${node.error})` : 'DOWN'),
+            percent(node.cpu),
+            percent(node.memory),
+            percent(node.disk),
+            node.network === null || node.network === undefined ? '-' : `${node.network} MB/s`,
+            node.uptime || '-'
+        ];
+        cells.forEach((value, index) => {
+            const cell = document.createElement('td');
+            cell.className = index < 2 ? 'py-1 pr-4' : 'py-1 pr-4 text-right';
+            if (index === 1) {
+                cell.classList.add(node.up ? 'text-green-400' : 'text-red-400');
+            }
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        return row;
+    }));
+}
+
 // Update element text
 function updateElement(id, value) {
     const element = document.getElementById(id);
@@ -119,24 +210,31 @@ function updateServiceStatus(services) {
     });
 }
 
-// Check SSH tunnel status
-function checkTunnelStatus() {
-    const services = [
-        { name: 'traefik', port: 8080 },
-        { name: 'grafana', port: 3000 },
-        { name: 'portainer', port: 9000 }
-    ];
-    
-    services.forEach(service => {
-        fetch(`http://localhost:${service.port}/`, { mode: 'no-cors' })
-            .then(() => {
-                const status = document.getElementById(`${service.name}-status`);
-                if (status) status.classList.add('online');
-            })
-            .catch(() => {
-                const status = document.getElementById(`${service.name}-status`);
-                if (status) status.classList.remove('online');
-            });
+// Fetch cached connectivity results from the server-side prober
+async function refreshConnectivity() {
+    try {
+        const response = await fetch('/admin/connectivity');
+        const data = await response.json();
+        
+        if (data.status === 'success') {
+            updateConnectivity(data.data.targets);
+        }
+    } catch (error) {
+        console.error('Failed to refresh connectivity:', error);
+    }
+}
+
+// Update service link lights with probe status and latency
+function updateConnectivity(targets) {
+    targets.forEach(target => {
+        const status = document.getElementById(`${target.name}-status`);
+        if (!status) return;
+        
+        status.classList.toggle('online', target.up);
+        const http = target.latency.http;
+        status.title = target.up
+            ? (http ? `p50 ${http.p50}ms / p99 ${http.p99}ms` : 'online')
+            : (target.error || 'offline');
     });
 }
 
@@ -0,0 +1,60 @@
+"""
+Compare two benchmark result files
+
+Usage:
+    python -m tests.benchmarks.compare BASELINE.json CURRENT.json [--threshold 10]
+
+Prints the change in every load percentile/RPS and micro-benchmark mean,
+and exits with status 1 if anything regressed by more than threshold percent.
+"""
+
+import sys
+import json
+import argparse
+
+# Metric name -> True if higher is better
+LOAD_METRICS = {'rps': True, 'p50_ms': False, 'p95_ms': False, 'p99_ms': False}
+MICRO_METRICS = {'mean_us': False, 'p95_us': False}
+
+def _compare(section, baseline, current, metrics, threshold):
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        for metric, higher_is_better in metrics.items():
+            old = baseline[name].get(metric)
+            new = current[name].get(metric)
+            if not old or new is None:
+                continue
+
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append(f'{section} {name} {metric}')
+            print(f'{section:5} {name:45} {metric:8} {old:12.3f} -> {new:12.3f} ({change:+6.1f}%){flag}')
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Percent change that counts as a regression (default 10)')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    print(f"baseline {baseline.get('revision')}  current {current.get('revision')}")
+    regressions = _compare('load', baseline.get('load', {}), current.get('load', {}), LOAD_METRICS, args.threshold)
+    regressions += _compare('micro', baseline.get('micro', {}), current.get('micro', {}), MICRO_METRICS, args.threshold)
+
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) over {args.threshold:g}%')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
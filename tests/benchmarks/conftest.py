@@ -0,0 +1,117 @@
+"""
+Benchmark fixtures
+Everything runs offline: Prometheus, Docker and psutil are replaced by the
+stand-ins in stubs.py. Results are written as JSON when the session ends.
+Benchmarks only run with `pytest --benchmarks`.
+
+Environment:
+    BENCH_OUTPUT           Result file (default bench_results/bench-<time>.json)
+    BENCH_REQUESTS         Requests per route in load tests (default 200)
+    BENCH_CONCURRENCY      Concurrent clients in load tests (default 8)
+    BENCH_PROM_LATENCY_MS  Stub Prometheus latency per request (default 5)
+    BENCH_ITERATIONS       Calls per micro-benchmark round (default 200)
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from tests.benchmarks.stubs import StubPrometheus, FakeDockerSocket, FakePsutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+@pytest.fixture(scope='session')
+def bench_settings():
+    return {
+        'requests': _env_int('BENCH_REQUESTS', 200),
+        'concurrency': _env_int('BENCH_CONCURRENCY', 8),
+        'prometheus_latency_ms': _env_int('BENCH_PROM_LATENCY_MS', 5),
+        'iterations': _env_int('BENCH_ITERATIONS', 200)
+    }
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+@pytest.fixture(scope='session')
+def bench_results(bench_settings):
+    """Collects results from every benchmark and saves them at session end"""
+    results = {'load': {}, 'micro': {}}
+    yield results
+
+    output = os.environ.get('BENCH_OUTPUT') or os.path.join(
+        ROOT, 'bench_results', f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': time.time(),
+            'revision': _git_revision(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'settings': bench_settings,
+            **results
+        }, f, indent=2)
+
+@pytest.fixture(scope='module')
+def fake_psutil():
+    """Canned psutil values, undone when the benchmark module finishes"""
+    with pytest.MonkeyPatch.context() as mp:
+        fake = FakePsutil()
+        fake.patch(mp)
+        yield fake
+
+@pytest.fixture(scope='session')
+def stub_prometheus(bench_settings):
+    stub = StubPrometheus(latency=bench_settings['prometheus_latency_ms'] / 1000).start()
+    yield stub
+    stub.stop()
+
+@pytest.fixture(scope='session')
+def fake_docker(tmp_path_factory):
+    sock = FakeDockerSocket(str(tmp_path_factory.mktemp('docker') / 'docker.sock')).start()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('DOCKER_HOST', sock.url)
+        yield sock
+    sock.stop()
+
+@pytest.fixture(scope='module')
+def app(stub_prometheus, fake_psutil, tmp_path_factory):
+    """Full app with the admin and API blueprints, wired to the stubs"""
+    from app import create_app
+    from blueprints.admin import admin_bp
+    from blueprints.api import api_bp
+
+    app = create_app()
+    app.config.from_object('config.TestingConfig')
+    app.config['PROMETHEUS_URL'] = stub_prometheus.url
+    app.config['DATA_DIR'] = str(tmp_path_factory.mktemp('data'))
+    app.config['TIMESERIES_DIR'] = os.path.join(app.config['DATA_DIR'], 'timeseries')
+
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(api_bp, url_prefix='/api')
+    return app
+
+@pytest.fixture(scope='module')
+def live_server(app):
+    """Threaded WSGI server for load tests; yields its base URL"""
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
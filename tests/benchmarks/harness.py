@@ -0,0 +1,96 @@
+"""
+Benchmark helpers
+Load generation against a live server and timing of plain function calls
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from utils.stats import percentile
+
+def run_load(url, total_requests, concurrency):
+    """
+    Issue total_requests GETs from concurrency keep-alive clients
+
+    Args:
+        url: Absolute URL to request
+        total_requests: Requests across all clients
+        concurrency: Number of concurrent clients
+
+    Returns:
+        dict: requests, concurrency, errors, rps and p50/p95/p99/max in ms
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_client = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def client(count):
+        session = requests.Session()
+        local = []
+        failed = 0
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                response.content
+                if response.status_code >= 400:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, per_client))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total_requests,
+        'concurrency': concurrency,
+        'errors': errors[0],
+        'rps': round(total_requests / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50, 0.0), 3),
+        'p95_ms': round(percentile(latencies, 95, 0.0), 3),
+        'p99_ms': round(percentile(latencies, 99, 0.0), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0
+    }
+
+def measure(func, *args, iterations=200, rounds=20):
+    """
+    Time func(*args) in rounds of iterations calls each
+
+    Args:
+        func: Callable to benchmark
+        iterations: Calls per timed round
+        rounds: Number of timed rounds
+
+    Returns:
+        dict: Per-call mean/p50/p95/min in microseconds
+    """
+    func(*args)  # Warm up caches and lazy imports
+
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func(*args)
+        per_call.append((time.perf_counter() - started) / iterations * 1e6)
+
+    per_call.sort()
+    return {
+        'iterations': iterations,
+        'rounds': rounds,
+        'mean_us': round(sum(per_call) / len(per_call), 3),
+        'p50_us': round(percentile(per_call, 50, 0.0), 3),
+        'p95_us': round(percentile(per_call, 95, 0.0), 3),
+        'min_us': round(per_call[0], 3)
+    }
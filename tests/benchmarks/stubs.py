@@ -0,0 +1,260 @@
+"""
+Offline stand-ins for the services the app talks to
+Stub Prometheus HTTP server, fake Docker Engine socket and psutil fixtures
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import socketserver
+from types import SimpleNamespace
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+PANEL_PATTERN = re.compile(r'"vps_panel", "([^"]+)"')
+
+class _PrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        parsed = urlparse(self.path)
+        endpoint = parsed.path.rsplit('/', 1)[-1]
+        recording = server.recordings.get(endpoint)
+        if recording is None:
+            self._send(404, {'status': 'error', 'error': f'no recording for {parsed.path}'})
+            return
+
+        query = parse_qs(parsed.query).get('query', [''])[0]
+        self._send(200, _replay(recording, query))
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def _replay(recording, query):
+    """
+    Return the recorded series a query would have produced
+
+    Batched panel queries (see utils.panels) get the series tagged with
+    their panel names; any other query gets the untagged series.
+    """
+    panels = set(PANEL_PATTERN.findall(query))
+    result = recording['data']['result']
+    if panels:
+        series = [s for s in result if s['metric'].get('vps_panel') in panels]
+    else:
+        series = [s for s in result if 'vps_panel' not in s['metric']]
+    return {
+        'status': recording['status'],
+        'data': {'resultType': recording['data']['resultType'], 'result': series}
+    }
+
+class StubPrometheus:
+    """
+    Threaded HTTP server replaying recorded query/query_range responses
+
+    Args:
+        latency: Seconds to sleep before each response
+        recordings_path: JSON file keyed by endpoint name
+    """
+
+    def __init__(self, latency=0.0, recordings_path=None):
+        with open(recordings_path or os.path.join(DATA_DIR, 'prometheus.json')) as f:
+            recordings = json.load(f)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _PrometheusHandler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.recordings = recordings
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+CONTAINERS = [
+    {'Id': 'a1b2c3d4e5f6' + '0' * 52, 'Name': '/vps-web', 'Image': 'sha256:' + '1' * 64, 'Tag': 'vps-web:latest'},
+    {'Id': 'b2c3d4e5f6a1' + '0' * 52, 'Name': '/vps-prometheus', 'Image': 'sha256:' + '2' * 64, 'Tag': 'prom/prometheus:latest'},
+    {'Id': 'c3d4e5f6a1b2' + '0' * 52, 'Name': '/vps-grafana', 'Image': 'sha256:' + '3' * 64, 'Tag': 'grafana/grafana:latest'}
+]
+
+class _DockerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = re.sub(r'^/v[\d.]+', '', urlparse(self.path).path)
+
+        if path == '/version':
+            return self._send({'ApiVersion': '1.41', 'Version': '24.0.0', 'MinAPIVersion': '1.12'})
+        if path == '/containers/json':
+            return self._send([{'Id': c['Id'], 'Names': [c['Name']], 'Image': c['Tag'], 'State': 'running'} for c in CONTAINERS])
+
+        match = re.match(r'^/containers/([0-9a-f]+)/(json|stats)$', path)
+        if match:
+            container = next((c for c in CONTAINERS if c['Id'].startswith(match.group(1))), None)
+            if container is None:
+                return self._send({'message': 'No such container'}, 404)
+            if match.group(2) == 'json':
+                return self._send({
+                    'Id': container['Id'], 'Name': container['Name'], 'Image': container['Image'],
+                    'State': {'Status': 'running', 'Running': True}, 'Config': {'Image': container['Tag']}
+                })
+            return self._send(_container_stats())
+
+        match = re.match(r'^/images/(.+)/json$', path)
+        if match:
+            image = next((c for c in CONTAINERS if c['Image'].endswith(match.group(1))), None)
+            if image is None:
+                return self._send({'message': 'No such image'}, 404)
+            return self._send({'Id': image['Image'], 'RepoTags': [image['Tag']]})
+
+        self._send({'message': f'page not found: {path}'}, 404)
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        return 'docker.sock'
+
+    def log_message(self, format, *args):
+        pass
+
+def _container_stats():
+    return {
+        'cpu_stats': {'cpu_usage': {'total_usage': 2_000_000_000}, 'system_cpu_usage': 900_000_000_000},
+        'precpu_stats': {'cpu_usage': {'total_usage': 1_900_000_000}, 'system_cpu_usage': 899_000_000_000},
+        'memory_stats': {'usage': 120 * 1024 * 1024, 'limit': 2 * 1024 ** 3}
+    }
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('docker.sock', 0)
+
+class FakeDockerSocket:
+    """
+    Docker Engine API subset served on a Unix socket
+
+    Point the Docker SDK at it with DOCKER_HOST=unix://<path>.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.server = _UnixHTTPServer(path, _DockerHandler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f'unix://{self.path}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+_snetio = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout')
+_sdiskio = namedtuple('sdiskio', 'read_count write_count read_bytes write_bytes read_time write_time')
+_sdiskpart = namedtuple('sdiskpart', 'device mountpoint fstype opts')
+_sdiskusage = namedtuple('sdiskusage', 'total used free percent')
+
+class FakePsutil:
+    """
+    Deterministic, non-blocking replacements for the psutil calls the app makes
+
+    Counters advance on every call so rate calculations see real deltas.
+    """
+
+    def __init__(self):
+        self._ticks = 0
+        self._lock = threading.Lock()
+
+    def _tick(self):
+        with self._lock:
+            self._ticks += 1
+            return self._ticks
+
+    def cpu_percent(self, interval=None, percpu=False):
+        return 12.5
+
+    def cpu_count(self, logical=True):
+        return 4
+
+    def virtual_memory(self):
+        total = 8 * 1024 ** 3
+        return SimpleNamespace(total=total, available=total // 2, used=total // 2, percent=50.0)
+
+    def disk_usage(self, path):
+        total = 80 * 1024 ** 3
+        return _sdiskusage(total, total * 41 // 100, total * 59 // 100, 41.0)
+
+    def disk_partitions(self, all=False):
+        return [
+            _sdiskpart('/dev/sda1', '/', 'ext4', 'rw'),
+            _sdiskpart('/dev/sdb1', '/data', 'ext4', 'rw')
+        ]
+
+    def disk_io_counters(self, perdisk=False, nowrap=True):
+        t = self._tick()
+        counters = {
+            'sda': _sdiskio(1000 * t, 2000 * t, 4096000 * t, 8192000 * t, 0, 0),
+            'sdb': _sdiskio(10 * t, 20 * t, 40960 * t, 81920 * t, 0, 0)
+        }
+        if perdisk:
+            return counters
+        return _sdiskio(*(sum(values) for values in zip(*counters.values())))
+
+    def net_io_counters(self, pernic=False, nowrap=True):
+        t = self._tick()
+        counters = {
+            'lo': _snetio(500 * t, 500 * t, 5 * t, 5 * t, 0, 0, 0, 0),
+            'eth0': _snetio(150000 * t, 900000 * t, 120 * t, 700 * t, 0, 0, 0, 0)
+        }
+        if pernic:
+            return counters
+        return _snetio(*(sum(values) for values in zip(*counters.values())))
+
+    def boot_time(self):
+        return time.time() - 3 * 86400 - 4 * 3600
+
+    def pids(self):
+        return [os.getpid()]
+
+    def patch(self, monkeypatch):
+        """Install on the psutil module with a pytest MonkeyPatch"""
+        import psutil
+        for name in ('cpu_percent', 'cpu_count', 'virtual_memory', 'disk_usage', 'disk_partitions',
+                     'disk_io_counters', 'net_io_counters', 'boot_time', 'pids'):
+            monkeypatch.setattr(psutil, name, getattr(self, name))
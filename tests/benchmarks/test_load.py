@@ -0,0 +1,24 @@
+"""
+Route load tests
+Requests per second and latency percentiles against a live threaded server
+"""
+
+import pytest
+
+from tests.benchmarks.harness import run_load
+
+pytestmark = pytest.mark.benchmark
+
+ROUTES = [
+    '/',
+    '/admin/metrics',
+    '/api/system',
+    '/api/prometheus/api/v1/query?query=up'
+]
+
+@pytest.mark.parametrize('route', ROUTES)
+def test_route_load(route, live_server, bench_settings, bench_results):
+    stats = run_load(live_server + route, bench_settings['requests'], bench_settings['concurrency'])
+    bench_results['load'][route] = stats
+
+    assert stats['errors'] == 0
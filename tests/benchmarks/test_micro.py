@@ -0,0 +1,114 @@
+"""
+Utility micro-benchmarks
+"""
+
+import re
+import random
+
+import pytest
+
+from tests.benchmarks.harness import measure
+from tests.benchmarks.legacy import (
+    legacy_sanitize_input, legacy_validate_contact_form, legacy_validate_email, legacy_validate_message
+)
+from utils.prometheus import format_bytes
+from utils.validators import (
+    ESCAPES, SPAM_RULES, sanitize_input, validate_contact_form, validate_contact_forms, validate_email, validate_message
+)
+
+pytestmark = pytest.mark.benchmark
+
+SHORT_TEXT = 'Hello <b>"Blue Djedi"</b> & friends / it\'s me'
+LONG_TEXT = ('Peace <script>alert("x")</script> and love / it\'s fine. ' * 90)[:5000]
+
+VALID_FORM = {
+    'name': 'Seeker',
+    'email': 'seeker@example.com',
+    'message': 'I would love to learn more about the temple and upcoming gatherings.'
+}
+SPAM_FORM = {
+    'name': 'Winner',
+    'email': 'promo@example.com',
+    'message': ('You are a winner of a prize! Click here now for casino bonuses. ' * 70)[:5000]
+}
+
+PLAIN_5000 = ('The temple welcomes every seeker with an open heart and kind words. ' * 80)[:5000]
+BATCH = [VALID_FORM, SPAM_FORM] * 50
+
+def _format_many(values):
+    for value in values:
+        format_bytes(value)
+
+def _legacy_validate_many(forms):
+    return [legacy_validate_contact_form(form) for form in forms]
+
+# Single-pass alternatives measured against the shipped implementations
+_ESCAPE_TABLE = str.maketrans(dict(ESCAPES))
+_ESCAPE_MAP = dict(ESCAPES)
+_ESCAPE_PATTERN = re.compile('[' + re.escape(''.join(_ESCAPE_MAP)) + ']')
+_SPAM_ALTERNATION = re.compile(
+    '(?i)' + '|'.join(f'(?P<{name}>{pattern.pattern[4:]})' for name, _, pattern, _ in SPAM_RULES)
+)
+
+def _escape_translate(text):
+    return text.translate(_ESCAPE_TABLE).strip()
+
+def _escape_re_sub(text):
+    return _ESCAPE_PATTERN.sub(lambda m: _ESCAPE_MAP[m.group()], text).strip()
+
+def _spam_alternation(text):
+    return {m.lastgroup for m in _SPAM_ALTERNATION.finditer(text)}
+
+CASES = {
+    'format_bytes': (_format_many, ([0, 512, 1536, 10 * 1024 ** 2, 3 * 1024 ** 3, 7 * 1024 ** 4],)),
+    'sanitize_input_short': (sanitize_input, (SHORT_TEXT,)),
+    'sanitize_input_5000': (sanitize_input, (LONG_TEXT,)),
+    'validate_contact_form_valid': (validate_contact_form, (VALID_FORM,)),
+    'validate_contact_form_spam_5000': (validate_contact_form, (SPAM_FORM,)),
+    'validate_contact_form_spam_5000_legacy': (legacy_validate_contact_form, (SPAM_FORM,)),
+    'sanitize_input_5000_legacy': (legacy_sanitize_input, (LONG_TEXT,)),
+    'sanitize_input_5000_translate': (_escape_translate, (LONG_TEXT,)),
+    'sanitize_input_5000_re_sub': (_escape_re_sub, (LONG_TEXT,)),
+    'spam_alternation_plain_5000': (_spam_alternation, (PLAIN_5000,)),
+    'validate_message_plain_5000': (validate_message, (PLAIN_5000,)),
+    'validate_message_plain_5000_legacy': (legacy_validate_message, (PLAIN_5000,)),
+    'validate_email': (validate_email, (VALID_FORM['email'],)),
+    'validate_email_legacy': (legacy_validate_email, (VALID_FORM['email'],)),
+    'validate_contact_forms_batch_100': (validate_contact_forms, (BATCH,)),
+    'validate_contact_forms_batch_100_legacy': (_legacy_validate_many, (BATCH,))
+}
+
+# Cases that do many calls per iteration run proportionally fewer iterations
+BATCH_SIZES = {
+    'validate_contact_forms_batch_100': len(BATCH),
+    'validate_contact_forms_batch_100_legacy': len(BATCH)
+}
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_micro(name, bench_settings, bench_results):
+    func, args = CASES[name]
+    iterations = max(bench_settings['iterations'] // BATCH_SIZES.get(name, 1), 1)
+    bench_results['micro'][name] = measure(func, *args, iterations=iterations)
+
+def test_results_are_sane():
+    assert format_bytes(1536) == '1.5 KB'
+    assert '<' not in sanitize_input(LONG_TEXT)
+    assert validate_contact_form(VALID_FORM) == (True, {})
+
+def test_alternatives_match_sanitize_input():
+    rng = random.Random(42)
+    alphabet = 'abc <>"\'/&\n\t@.xyz'
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        assert _escape_translate(text) == _escape_re_sub(text) == sanitize_input(text)
+
+def test_docker_stats(fake_docker, bench_settings, bench_results):
+    pytest.importorskip('docker')
+    from utils.system import get_docker_stats
+
+    stats = get_docker_stats()
+    assert len(stats.get('containers', [])) == 3
+
+    bench_results['micro']['get_docker_stats'] = measure(
+        get_docker_stats, iterations=max(bench_settings['iterations'] // 20, 1), rounds=5
+    )
@@ -0,0 +1,21 @@
+"""
+Test configuration
+Benchmarks (tests/benchmarks) are opt-in: pass --benchmarks to run them.
+"""
+
+import pytest
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmarks', action='store_true', default=False,
+                     help='run the load tests and micro-benchmarks in tests/benchmarks')
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: load test or micro-benchmark (run with --benchmarks)')
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='benchmarks run only with --benchmarks')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,923 @@
+"""
+Utility tests
+"""
+
+import os
+import json
+import math
+import contextlib
+from collections import namedtuple
+
+import psutil
+import pytest
+
+from utils import panels
+from utils.timeseries import (
+    SegmentStore, FILE_HEADER, BLOCK_HEADER, DOWNSAMPLED_SUFFIX,
+    _encode_block, _encode_file_header, _read_segment
+)
+
+# Local time-series store
+
+FIELDS = ('a', 'b')
+T0 = 1_699_999_980  # multiple of the 30s and 60s steps below
+
+def _store(tmp_path, **kwargs):
+    options = dict(fields=FIELDS, segment_seconds=60, flush_samples=1,
+                   retention_seconds=3600, downsample_after=600, downsample_step=30)
+    options.update(kwargs)
+    return SegmentStore(str(tmp_path), **options)
+
+def _segment_files(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path) if name.startswith('seg-'))
+
+def test_segment_round_trip(tmp_path):
+    path = tmp_path / 'seg.tsd'
+    rows = [(T0 + i, float(i), i * 2.5) for i in range(5)]
+    path.write_bytes(_encode_file_header(FIELDS) + _encode_block(rows[:3], 2) + _encode_block(rows[3:], 2))
+
+    assert _read_segment(str(path), -math.inf, math.inf, FIELDS) == rows
+    assert _read_segment(str(path), T0 + 1, T0 + 3, FIELDS) == rows[1:4]
+
+def test_segment_maps_fields_by_name(tmp_path):
+    path = tmp_path / 'seg.tsd'
+    path.write_bytes(_encode_file_header(('b', 'old')) + _encode_block([(T0, 1.0, 2.0)], 2))
+
+    (row,) = _read_segment(str(path), -math.inf, math.inf, FIELDS)
+    assert row[:1] == (T0,)
+    assert math.isnan(row[1])
+    assert row[2] == 1.0
+
+def test_segment_ignores_torn_trailing_block(tmp_path):
+    path = tmp_path / 'seg.tsd'
+    complete = _encode_file_header(FIELDS) + _encode_block([(T0, 1.0, 2.0)], 2)
+    torn = _encode_block([(T0 + 1, 3.0, 4.0), (T0 + 2, 5.0, 6.0)], 2)
+    for cut in (4, BLOCK_HEADER.size, len(torn) - 1):
+        path.write_bytes(complete + torn[:cut])
+        assert _read_segment(str(path), -math.inf, math.inf, FIELDS) == [(T0, 1.0, 2.0)]
+
+def test_segment_shorter_than_header_is_empty(tmp_path):
+    path = tmp_path / 'seg.tsd'
+    path.write_bytes(b'VPS')
+    assert FILE_HEADER.size > 3
+    assert _read_segment(str(path), -math.inf, math.inf, FIELDS) == []
+
+def test_store_query_includes_buffer(tmp_path):
+    store = _store(tmp_path, flush_samples=3)
+    for i in range(4):
+        store.append(T0 + i, {'a': i})
+
+    rows = store.query(T0, T0 + 10)
+    assert [r[0] for r in rows] == [T0, T0 + 1, T0 + 2, T0 + 3]
+    assert math.isnan(rows[0][2])
+
+def test_store_query_reads_segment_past_nominal_end(tmp_path):
+    store = _store(tmp_path, segment_seconds=50, flush_samples=5)
+    # The first block (T0..T0+60) runs past the segment's nominal end at T0+50
+    for i in range(10):
+        store.append(T0 + i * 15, {'a': i, 'b': i})
+
+    assert _segment_files(tmp_path) == [f'seg-{T0:010d}.tsd', f'seg-{T0 + 75:010d}.tsd']
+    rows = store.query(T0 + 55, T0 + 100)
+    assert [r[0] for r in rows] == [T0 + 60, T0 + 75, T0 + 90]
+
+def test_compact_downsamples_then_expires(tmp_path):
+    store = _store(tmp_path)
+    for i in range(60):
+        store.append(T0 + i, {'a': i, 'b': 1.0})
+    store._active_path = None
+    store.append(T0 + 60, {'a': 0.0})
+
+    store.compact(now=T0 + 60 + 600 + 1)
+    names = _segment_files(tmp_path)
+    assert names == [f'seg-{T0:010d}{DOWNSAMPLED_SUFFIX}', f'seg-{T0 + 60:010d}.tsd']
+
+    assert store.query(T0, T0 + 59) == [(T0 + 14.5, 14.5, 1.0), (T0 + 44.5, 44.5, 1.0)]
+
+    # Compacting again does not rewrite the downsampled segment
+    mtime = os.path.getmtime(tmp_path / names[0])
+    store.compact(now=T0 + 60 + 600 + 2)
+    assert os.path.getmtime(tmp_path / names[0]) == mtime
+
+    store.compact(now=T0 + 61 + 3600 + 1)
+    assert _segment_files(tmp_path) == [names[1]]
+
+def test_compact_keeps_active_segment(tmp_path):
+    store = _store(tmp_path)
+    store.append(T0, {'a': 1.0})
+    store.compact(now=T0 + 10 * 3600)
+    assert len(_segment_files(tmp_path)) == 1
+
+def test_compact_removes_interrupted_downsample(tmp_path):
+    store = _store(tmp_path)
+    leftover = tmp_path / f'seg-{T0:010d}{DOWNSAMPLED_SUFFIX}.tmp'
+    leftover.write_bytes(b'partial')
+    store.compact(now=T0)
+    assert not leftover.exists()
+
+def test_host_sampler_network_rate(monkeypatch):
+    from utils import timeseries
+
+    nic = namedtuple('nic', 'bytes_sent bytes_recv')
+    readings = iter([
+        {'lo': nic(0, 0), 'eth0': nic(100, 100), 'eth1': nic(50, 0)},
+        {'lo': nic(10 ** 9, 0), 'eth0': nic(300, 400), 'eth1': nic(0, 0), 'wg0': nic(10 ** 6, 0)}
+    ])
+    monkeypatch.setattr(timeseries.psutil, 'net_io_counters', lambda pernic: next(readings))
+    monkeypatch.setattr(timeseries.psutil, 'cpu_percent', lambda interval: 0.0)
+
+    sampler = timeseries.HostSampler()
+    assert math.isnan(sampler._network_rate(100.0))
+    # eth0 moved 500 bytes; eth1 reset and wg0 is new, lo is ignored
+    assert sampler._network_rate(102.0) == 250.0
+
+# Host metrics collector
+
+_NetIO = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout')
+_DiskIO = namedtuple('sdiskio', 'read_count write_count read_bytes write_bytes')
+_Partition = namedtuple('sdiskpart', 'device mountpoint fstype opts')
+_Usage = namedtuple('sdiskusage', 'total used free percent')
+
+@pytest.fixture
+def fake_host(monkeypatch):
+    """Mutable psutil readings and clock for HostCollector"""
+    host = {
+        'clock': 1000.0,
+        'net': {},
+        'disks': {},
+        'partitions': [],
+        'usage': {}
+    }
+
+    def disk_usage(path):
+        if path not in host['usage']:
+            raise OSError(f"{path} is not mounted")
+        return host['usage'][path]
+
+    monkeypatch.setattr(psutil, 'net_io_counters', lambda pernic: dict(host['net']))
+    monkeypatch.setattr(psutil, 'disk_io_counters', lambda perdisk: dict(host['disks']))
+    monkeypatch.setattr(psutil, 'disk_partitions', lambda all: list(host['partitions']))
+    monkeypatch.setattr(psutil, 'disk_usage', disk_usage)
+    monkeypatch.setattr('time.monotonic', lambda: host['clock'])
+    return host
+
+def _by_name(items, key='name'):
+    return {item[key]: item for item in items}
+
+def test_collector_rates_from_deltas(fake_host):
+    from utils.collector import HostCollector
+
+    fake_host['net'] = {'eth0': _NetIO(1000, 2000, 10, 20, 0, 0, 0, 0), 'lo': _NetIO(5, 5, 1, 1, 0, 0, 0, 0)}
+    fake_host['disks'] = {'sda': _DiskIO(100, 200, 4096, 8192)}
+    collector = HostCollector().sample()
+
+    # The first sample only records counters
+    details = collector.to_dict()
+    assert {i['tx_bytes_per_sec'] for i in details['interfaces']} == {0.0}
+    assert details['disks'][0]['read_iops'] == 0.0
+
+    fake_host['clock'] += 2
+    fake_host['net']['eth0'] = _NetIO(3000, 6000, 14, 30, 2, 0, 0, 4)
+    fake_host['net']['lo'] = _NetIO(105, 5, 2, 1, 0, 0, 0, 0)
+    fake_host['disks']['sda'] = _DiskIO(110, 240, 4096 + 2048, 8192 + 8192)
+    details = collector.sample().to_dict()
+
+    eth0 = _by_name(details['interfaces'])['eth0']
+    assert eth0['tx_bytes_per_sec'] == 1000.0 and eth0['rx_bytes_per_sec'] == 2000.0
+    assert eth0['tx_packets_per_sec'] == 2.0 and eth0['rx_packets_per_sec'] == 5.0
+    assert eth0['errors_per_sec'] == 1.0 and eth0['drops_per_sec'] == 2.0
+    assert eth0['bytes_sent'] == 3000
+    assert details['disks'] == [{
+        'name': 'sda', 'read_iops': 5.0, 'write_iops': 20.0,
+        'read_bytes_per_sec': 1024.0, 'write_bytes_per_sec': 4096.0
+    }]
+    assert collector.network_rate() == 3000.0
+    assert collector.network_rate(include_loopback=True) == 3050.0
+
+def test_collector_clamps_counter_reset(fake_host):
+    from utils.collector import HostCollector
+
+    fake_host['net'] = {'eth0': _NetIO(10 ** 6, 10 ** 6, 100, 100, 0, 0, 0, 0)}
+    collector = HostCollector().sample()
+    fake_host['clock'] += 1
+    fake_host['net']['eth0'] = _NetIO(10, 500, 1, 1, 0, 0, 0, 0)
+    eth0 = collector.sample().to_dict()['interfaces'][0]
+    assert eth0['tx_bytes_per_sec'] == 0.0 and eth0['rx_bytes_per_sec'] == 0.0
+
+    # Rates resume from the reset counters
+    fake_host['clock'] += 1
+    fake_host['net']['eth0'] = _NetIO(110, 500, 1, 1, 0, 0, 0, 0)
+    assert collector.sample().to_dict()['interfaces'][0]['tx_bytes_per_sec'] == 100.0
+
+def test_collector_tracks_devices_appearing_and_vanishing(fake_host):
+    from utils.collector import HostCollector
+
+    fake_host['net'] = {'eth0': _NetIO(0, 0, 0, 0, 0, 0, 0, 0)}
+    fake_host['disks'] = {'sda': _DiskIO(0, 0, 0, 0)}
+    collector = HostCollector().sample()
+    eth0_state = collector.interfaces['eth0']
+
+    fake_host['clock'] += 1
+    fake_host['net']['wg0'] = _NetIO(500, 0, 0, 0, 0, 0, 0, 0)
+    fake_host['disks'] = {'nvme0n1': _DiskIO(1, 1, 1, 1)}
+    details = collector.sample().to_dict()
+
+    assert sorted(_by_name(details['interfaces'])) == ['eth0', 'wg0']
+    # New devices start unprimed; existing state objects are reused
+    assert _by_name(details['interfaces'])['wg0']['tx_bytes_per_sec'] == 0.0
+    assert collector.interfaces['eth0'] is eth0_state
+    assert [d['name'] for d in details['disks']] == ['nvme0n1']
+
+    fake_host['clock'] += 1
+    del fake_host['net']['eth0']
+    fake_host['net']['wg0'] = _NetIO(1500, 0, 0, 0, 0, 0, 0, 0)
+    details = collector.sample().to_dict()
+    assert [i['name'] for i in details['interfaces']] == ['wg0']
+    assert details['interfaces'][0]['tx_bytes_per_sec'] == 1000.0
+
+def test_collector_filters_pseudo_devices(fake_host):
+    from utils.collector import HostCollector
+
+    fake_host['disks'] = {
+        'sda': _DiskIO(0, 0, 0, 0), 'loop0': _DiskIO(0, 0, 0, 0),
+        'ram0': _DiskIO(0, 0, 0, 0), 'zram0': _DiskIO(0, 0, 0, 0)
+    }
+    fake_host['partitions'] = [
+        _Partition('/dev/sda1', '/', 'ext4', 'rw'),
+        _Partition('tmpfs', '/run', 'tmpfs', 'rw'),
+        _Partition('/dev/loop0', '/snap/core', 'squashfs', 'ro')
+    ]
+    fake_host['usage'] = {p.mountpoint: _Usage(100, 40, 60, 40.0) for p in fake_host['partitions']}
+    details = HostCollector().sample().to_dict()
+
+    assert [d['name'] for d in details['disks']] == ['sda']
+    assert [m['mountpoint'] for m in details['mounts']] == ['/']
+
+def test_collector_mount_refresh_and_unmount(fake_host):
+    from utils import collector as collector_module
+
+    fake_host['partitions'] = [_Partition('/dev/sda1', '/', 'ext4', 'rw'), _Partition('/dev/sdb1', '/data', 'xfs', 'rw')]
+    fake_host['usage'] = {'/': _Usage(100, 40, 60, 40.0), '/data': _Usage(200, 50, 150, 25.0)}
+    collector = collector_module.HostCollector().sample()
+    assert _by_name(collector.to_dict()['mounts'], 'mountpoint')['/data'] == {
+        'mountpoint': '/data', 'device': '/dev/sdb1', 'fstype': 'xfs',
+        'total': 200, 'used': 50, 'free': 150, 'percent': 25.0
+    }
+
+    # Unmounted between table refreshes: dropped on the next sample
+    fake_host['clock'] += 1
+    del fake_host['usage']['/data']
+    fake_host['usage']['/'] = _Usage(100, 50, 50, 50.0)
+    mounts = collector.sample().to_dict()['mounts']
+    assert mounts == [{'mountpoint': '/', 'device': '/dev/sda1', 'fstype': 'ext4',
+                       'total': 100, 'used': 50, 'free': 50, 'percent': 50.0}]
+
+    # New mounts only appear once the table is re-read
+    fake_host['partitions'].append(_Partition('/dev/sdc1', '/backup', 'ext4', 'rw'))
+    fake_host['usage']['/backup'] = _Usage(10, 1, 9, 10.0)
+    fake_host['clock'] += 1
+    assert len(collector.sample().to_dict()['mounts']) == 1
+    fake_host['clock'] += collector_module.MOUNT_REFRESH_SECONDS
+    assert sorted(_by_name(collector.sample().to_dict()['mounts'], 'mountpoint')) == ['/', '/backup']
+
+# Panel query planner
+
+PANELS = [
+    {'name': 'cpu', 'range': True, 'query': 'q_cpu'},
+    {'name': 'mem', 'range': True, 'query': 'q_mem'},
+    {'name': 'net', 'range': True, 'duration': 3600, 'step': 60, 'query': 'q_net'},
+    {'name': 'disk', 'query': 'q_disk'},
+    {'name': 'up', 'query': 'q_up'},
+    {'name': 'slow', 'query': 'q_slow', 'batch': False},
+    {'name': 'static'}
+]
+
+def _series(panel, value, **labels):
+    return {'metric': {panels.PANEL_LABEL: panel, **labels}, 'value': [T0, str(value)]}
+
+def test_plan_groups_panels_by_batch_key():
+    plan = panels.plan_queries(PANELS)
+    assert [b['panels'] for b in plan] == [['cpu', 'mem'], ['net'], ['disk', 'up'], ['slow']]
+    assert [(b['range'], b['duration'], b['step']) for b in plan] == [
+        (True, panels.DEFAULT_DURATION, panels.DEFAULT_STEP), (True, 3600, 60),
+        (False, panels.DEFAULT_DURATION, panels.DEFAULT_STEP), (False, panels.DEFAULT_DURATION, panels.DEFAULT_STEP)
+    ]
+
+def test_plan_tags_and_joins_queries():
+    (batch,) = panels.plan_queries(PANELS[3:5])
+    assert batch['query'] == (
+        'label_replace(q_disk, "vps_panel", "disk", "", "")'
+        ' or label_replace(q_up, "vps_panel", "up", "", "")'
+    )
+
+def test_execute_plan_splits_results_by_panel(monkeypatch):
+    queries = []
+
+    def fake_query(query):
+        queries.append(query)
+        return {'resultType': 'vector', 'result': [
+            _series('up', 1, job='node'), _series('disk', 42, mountpoint='/'),
+            _series('up', 0, job='docker'), _series('other', 7)
+        ]}
+
+    monkeypatch.setattr(panels, 'query_prometheus', fake_query)
+    results = panels.query_panels(PANELS[3:5])
+
+    assert len(queries) == 1
+    assert results['disk'] == {'resultType': 'vector', 'result': [
+        {'metric': {'mountpoint': '/'}, 'value': [T0, '42']}
+    ]}
+    assert [s['metric'] for s in results['up']['result']] == [{'job': 'node'}, {'job': 'docker'}]
+
+def test_execute_plan_marks_failed_batch(monkeypatch):
+    ranges = []
+
+    def fake_range(query, duration, step):
+        ranges.append((duration, step))
+        return None if duration == 3600 else {'resultType': 'matrix', 'result': []}
+
+    monkeypatch.setattr(panels, 'query_prometheus_range', fake_range)
+    monkeypatch.setattr(panels, 'query_prometheus', lambda query: None)
+    results = panels.query_panels(PANELS)
+
+    assert sorted(ranges) == [(panels.DEFAULT_DURATION, panels.DEFAULT_STEP), (3600, 60)]
+    assert results['cpu'] == results['mem'] == {'resultType': 'matrix', 'result': []}
+    assert results['net'] is None
+    assert results['disk'] is None and results['up'] is None and results['slow'] is None
+    assert 'static' not in results
+
+def test_local_fallback_uses_panel_range(monkeypatch):
+    admin = pytest.importorskip('blueprints.admin')
+    calls = []
+    monkeypatch.setattr(admin, 'local_query_range', lambda *args: calls.append(args) or {'result': [1]})
+
+    panel = {'name': 'net', 'range': True, 'duration': 3600, 'step': 60, 'local_field': 'net_bytes_per_sec'}
+    assert admin._with_local_fallback(panel, {'result': []}) == {'result': [1]}
+    assert admin._with_local_fallback({'name': 'cpu', 'range': True, 'local_field': 'cpu_percent'}, None)
+    assert calls == [
+        ('net_bytes_per_sec', 3600, 60),
+        ('cpu_percent', panels.DEFAULT_DURATION, panels.DEFAULT_STEP)
+    ]
+
+# Top-processes sampler
+
+_CpuTimes = namedtuple('cpu_times', 'user system')
+_MemoryInfo = namedtuple('memory_info', 'rss')
+_IoCounters = namedtuple('io_counters', 'read_bytes write_bytes')
+
+class _FakeProcess:
+    """psutil.Process stand-in driven by a shared table of pid -> counters"""
+
+    table = {}
+
+    def __init__(self, pid):
+        if pid not in self.table:
+            raise psutil.NoSuchProcess(pid)
+        self.pid = pid
+
+    def _row(self):
+        row = self.table.get(self.pid)
+        if row is None:
+            raise psutil.NoSuchProcess(self.pid)
+        if row == 'denied':
+            raise psutil.AccessDenied(self.pid)
+        return row
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def cpu_times(self):
+        return _CpuTimes(self._row()['cpu'], 0.0)
+
+    def memory_info(self):
+        return _MemoryInfo(self._row()['rss'])
+
+    def name(self):
+        return self._row()['name']
+
+    def io_counters(self):
+        return _IoCounters(self._row()['io'], 0)
+
+@pytest.fixture
+def process_table(monkeypatch):
+    from utils import processes
+
+    table = {}
+    clock = [1000.0]
+    monkeypatch.setattr(_FakeProcess, 'table', table)
+    monkeypatch.setattr(psutil, 'Process', _FakeProcess)
+    monkeypatch.setattr(psutil, 'pids', lambda: sorted(table))
+    monkeypatch.setattr(processes.time, 'monotonic', lambda: clock[0])
+    return table, clock
+
+def _by_pid(top, key='cpu'):
+    return {p['pid']: p for p in top[key]}
+
+def test_process_sampler_rates_from_deltas(process_table):
+    from utils.processes import ProcessSampler
+
+    table, clock = process_table
+    table[1] = {'name': 'init', 'cpu': 10.0, 'rss': 100, 'io': 0}
+    table[2] = {'name': 'web', 'cpu': 50.0, 'rss': 300, 'io': 1000}
+
+    sampler = ProcessSampler().sample()
+    assert {p['cpu_percent'] for p in sampler.top()['cpu']} == {0.0}
+
+    clock[0] += 2
+    table[1]['cpu'] += 0.5
+    table[2].update(cpu=51.0, io=5000)
+    top = sampler.sample().top()
+
+    assert [p['pid'] for p in top['cpu']] == [2, 1]
+    assert _by_pid(top)[2]['cpu_percent'] == 50.0
+    assert _by_pid(top)[1]['cpu_percent'] == 25.0
+    assert _by_pid(top, 'io')[2]['io_bytes_per_sec'] == 2000.0
+    assert [p['pid'] for p in top['memory']] == [2, 1]
+
+def test_process_sampler_min_interval(process_table):
+    from utils.processes import ProcessSampler
+
+    table, clock = process_table
+    table[1] = {'name': 'init', 'cpu': 1.0, 'rss': 1, 'io': 0}
+    sampler = ProcessSampler().sample()
+    clock[0] += 1
+    table[1]['cpu'] = 2.0
+    assert sampler.sample(min_interval=2).top()['cpu'][0]['cpu_percent'] == 0.0
+    clock[0] += 1
+    assert sampler.sample(min_interval=2).top()['cpu'][0]['cpu_percent'] == 50.0
+
+def test_process_sampler_pid_reuse_and_exit(process_table):
+    from utils.processes import ProcessSampler
+
+    table, clock = process_table
+    table[7] = {'name': 'old', 'cpu': 100.0, 'rss': 10, 'io': 500}
+    table[8] = {'name': 'gone', 'cpu': 1.0, 'rss': 10, 'io': 0}
+    table[9] = {'name': 'root-only', 'cpu': 1.0, 'rss': 10, 'io': 0}
+    sampler = ProcessSampler().sample()
+
+    # PID 7 is reused by a new process with lower counters, 8 exits,
+    # 9 becomes unreadable but stays listed
+    clock[0] += 1
+    table[7] = {'name': 'new', 'cpu': 0.2, 'rss': 20, 'io': 0}
+    del table[8]
+    table[9] = 'denied'
+    top = sampler.sample().top()
+
+    assert sorted(_by_pid(top)) == [7, 9]
+    assert _by_pid(top)[7] == {'pid': 7, 'name': 'new', 'cpu_percent': 0.0, 'rss': 20, 'io_bytes_per_sec': 0.0}
+
+    clock[0] += 1
+    table[7]['cpu'] = 0.7
+    assert _by_pid(sampler.sample().top())[7]['cpu_percent'] == 50.0
+
+def test_process_state_keeps_top_n(process_table, tmp_path, monkeypatch):
+    from flask import Flask
+    from utils import processes
+
+    table, clock = process_table
+    for pid in range(1, 31):
+        table[pid] = {'name': f'p{pid}', 'cpu': float(pid), 'rss': pid, 'io': pid}
+
+    tasks = []
+    monkeypatch.setattr(processes, '_sampler', None)
+    monkeypatch.setattr(processes, 'start_leader_task', lambda app, name, interval, func, lock: tasks.append(func))
+    app = Flask(__name__)
+    app.config.update(
+        PROCESS_SAMPLING_ENABLED=True, PROCESS_SAMPLE_INTERVAL=2, PROCESS_TOP_N=5,
+        DATA_DIR=str(tmp_path / 'data'), RUNTIME_DIR=str(tmp_path / 'run')
+    )
+    processes.init_processes(app)
+    clock[0] += 2
+    tasks[0]()
+
+    written = json.loads((tmp_path / 'run' / 'processes.json').read_text())
+    assert [len(written[key]) for key in ('cpu', 'memory', 'io')] == [5, 5, 5]
+    assert not (tmp_path / 'data' / 'processes.json').exists()
+    with app.app_context():
+        assert [p['pid'] for p in processes.get_process_state(3)['memory']] == [30, 29, 28]
+
+# Fleet view
+
+class _AgentResponse:
+    def __init__(self, percent):
+        self.percent = percent
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'cpu': {'percent': self.percent}, 'memory': {'percent': 1.0},
+                'disk': {'percent': 2.0}, 'uptime_short': '1d'}
+
+@pytest.fixture
+def slow_fleet(monkeypatch):
+    import time
+    from utils import fleet
+
+    delays = {'prometheus': 0.0, 'agent': 0.0}
+
+    def fake_query(panels):
+        time.sleep(delays['prometheus'])
+        return {'cpu': {'resultType': 'vector', 'result': [
+            {'metric': {'instance': '10.0.0.1:9100'}, 'value': [T0, '12.345']}
+        ]}}
+
+    def fake_get(url, timeout):
+        time.sleep(delays['agent'] if 'hung' not in url else 2)
+        return _AgentResponse(50.0)
+
+    monkeypatch.setattr(fleet, 'query_panels', fake_query)
+    monkeypatch.setattr(fleet.requests, 'get', fake_get)
+    return fleet, delays
+
+def test_fleet_summary_merges_sources(slow_fleet):
+    fleet, _ = slow_fleet
+    nodes = [
+        {'name': 'vps-1', 'url': 'http://a', 'instance': '10.0.0.1:9100'},
+        {'name': 'vps-2', 'url': 'http://b'},
+        {'name': 'ghost'}
+    ]
+    rows = {row['name']: row for row in fleet.get_fleet_summary([{'name': 'cpu', 'query': 'q'}], nodes)['nodes']}
+
+    assert rows['vps-1']['source'] == 'prometheus+agent'
+    assert rows['vps-1']['cpu'] == 12.3 and rows['vps-1']['memory'] == 1.0
+    assert rows['vps-2']['source'] == 'agent' and rows['vps-2']['up'] is True
+    assert rows['ghost']['error'] == 'no data'
+
+def test_fleet_summary_shares_one_deadline(slow_fleet):
+    fleet, delays = slow_fleet
+    delays.update(prometheus=0.4, agent=0.4)
+    nodes = [{'name': f'n{i:02d}', 'url': f'http://n{i}'} for i in range(40)]
+    nodes.append({'name': 'hung', 'url': 'http://hung'})
+
+    summary = fleet.get_fleet_summary([{'name': 'cpu', 'query': 'q'}], nodes, timeout=0.8)
+
+    assert summary['elapsed_ms'] < 1000
+    rows = {row['name']: row for row in summary['nodes']}
+    assert all(rows[f'n{i:02d}']['up'] for i in range(40))
+    assert rows['hung']['error'] == 'timeout'
+
+    # A slow Prometheus does not extend the deadline
+    delays.update(prometheus=2.0)
+    summary = fleet.get_fleet_summary([{'name': 'cpu', 'query': 'q'}], nodes[:3], timeout=0.5)
+    assert summary['elapsed_ms'] < 800
+    assert all(row['up'] for row in summary['nodes'])
+
+def test_fleet_summary_tolerates_bad_agent_json(monkeypatch):
+    from utils import fleet
+
+    payloads = {
+        'http://null': {'cpu': None, 'memory': 'n/a', 'disk': {'percent': 3.0}},
+        'http://list': [1, 2, 3],
+        'http://broken': RuntimeError('agent exploded')
+    }
+
+    class Response:
+        def __init__(self, payload):
+            self.payload = payload
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            if isinstance(self.payload, Exception):
+                raise self.payload
+            return self.payload
+
+    monkeypatch.setattr(fleet, 'query_panels', lambda panels: {})
+    monkeypatch.setattr(fleet.requests, 'get', lambda url, timeout: Response(payloads[url.rsplit('/api', 1)[0]]))
+    nodes = [{'name': name, 'url': f'http://{name}'} for name in ('null', 'list', 'broken')]
+    rows = {row['name']: row for row in fleet.get_fleet_summary([], nodes)['nodes']}
+
+    assert rows['null']['up'] is True
+    assert (rows['null']['cpu'], rows['null']['memory'], rows['null']['disk']) == (None, None, 3.0)
+    assert rows['list']['up'] is False and rows['list']['error'] == 'invalid response'
+    assert rows['broken']['up'] is False and rows['broken']['error'] == 'agent exploded'
+
+# Request profiling
+
+def test_server_timing_hides_span_detail_outside_admin(tmp_path):
+    from flask import Flask, Blueprint
+    from utils.profiling import init_profiling, span
+
+    app = Flask(__name__)
+    app.config.update(
+        PROFILING_ENABLED=True, PROFILING_SLOW_MS=60000, PROFILING_SAMPLE_SLOW=False,
+        PROFILING_SAMPLE_INTERVAL=0.005, PROFILING_DIR=str(tmp_path)
+    )
+    init_profiling(app)
+
+    def view():
+        with span('prometheus.query', 'sum(rate(secret_metric[5m]))'):
+            return 'ok'
+
+    admin = Blueprint('admin', __name__)
+    admin.add_url_rule('/metrics', 'metrics', view)
+    app.add_url_rule('/public', 'public', view)
+    app.register_blueprint(admin, url_prefix='/admin')
+
+    client = app.test_client()
+    public = client.get('/public').headers['Server-Timing']
+    assert public.startswith('prometheus.query;dur=') and 'desc=' not in public
+    assert 'secret_metric' in client.get('/admin/metrics').headers['Server-Timing']
+    assert 'secret_metric' not in client.get('/public?profile=1').headers['Server-Timing']
+
+# Alert engine
+
+RULES = [
+    {'name': 'CPU', 'metric': 'cpu', 'op': '>', 'threshold': 90, 'clear': 80, 'for': 60},
+    {'name': 'Disk', 'metric': 'disk', 'op': '>', 'threshold': 85}
+]
+
+def _engine(sent, **kwargs):
+    from utils.alerts import AlertEngine
+    options = dict(group_wait=30, repeat_interval=3600)
+    options.update(kwargs)
+    return AlertEngine(RULES, sent.append, **options)
+
+def test_alert_fires_after_for_duration():
+    sent = []
+    engine = _engine(sent, group_wait=0)
+    engine.observe(0, {'cpu': 95})
+    engine.observe(30, {'cpu': 95})
+    assert engine.active() == [] and sent == []
+
+    # Dropping below the threshold restarts the wait
+    engine.observe(45, {'cpu': 50})
+    engine.observe(60, {'cpu': 95})
+    engine.observe(110, {'cpu': 95})
+    assert engine.active() == []
+
+    engine.observe(120, {'cpu': 95})
+    assert [a['name'] for a in engine.active()] == ['CPU']
+    assert len(sent) == 1 and 'FIRING' in sent[0]
+
+def test_alert_hysteresis():
+    from utils.alerts import AlertEngine
+
+    sent = []
+    rules = [{'name': 'Memory', 'metric': 'memory', 'op': '>', 'threshold': 90, 'clear': 85}]
+    engine = AlertEngine(rules, sent.append, group_wait=0)
+    engine.observe(0, {'memory': 95})
+    # Below the threshold but above clear: still firing
+    engine.observe(10, {'memory': 88})
+    engine.observe(20, {'memory': 92, 'other': 1})
+    assert [a['name'] for a in engine.active()] == ['Memory']
+    assert len(sent) == 1
+
+    # Missing or NaN values leave the state alone
+    engine.observe(30, {'memory': math.nan})
+    assert engine.active()
+
+    engine.observe(40, {'memory': 84.9})
+    assert engine.active() == []
+    assert len(sent) == 2 and 'RESOLVED' in sent[1]
+
+def test_alerts_are_grouped():
+    sent = []
+    engine = _engine(sent)
+    engine.observe(0, {'disk': 90})
+    engine.observe(10, {'cpu': 95})
+    engine.observe(20, {'cpu': 95})
+    assert sent == []
+    engine.observe(30, {'cpu': 95})
+    assert len(sent) == 1 and 'Disk' in sent[0] and 'CPU' not in sent[0]
+
+    engine.observe(70, {'cpu': 95})
+    engine.observe(100, {'cpu': 95})
+    assert len(sent) == 2 and 'CPU' in sent[1]
+
+def test_alert_resolved_within_group_window_is_not_sent():
+    sent = []
+    engine = _engine(sent)
+    engine.observe(0, {'disk': 90})
+    engine.observe(10, {'disk': 50})
+    engine.observe(100, {'disk': 50})
+    assert sent == [] and engine.active() == []
+
+def test_alert_repeats_while_firing():
+    sent = []
+    engine = _engine(sent, group_wait=0, repeat_interval=100)
+    engine.observe(0, {'disk': 90})
+    engine.observe(50, {'disk': 90})
+    assert len(sent) == 1
+    engine.observe(100, {'disk': 90})
+    assert len(sent) == 2 and 'FIRING' in sent[1]
+
+def test_alert_notification_retried_after_failure():
+    sent = []
+    failures = [1]
+
+    def flaky(text):
+        if failures:
+            failures.pop()
+            raise RuntimeError('telegram down')
+        sent.append(text)
+
+    from utils.alerts import AlertEngine
+    engine = AlertEngine(RULES, flaky, group_wait=0)
+    engine.observe(0, {'disk': 90})
+    assert sent == []
+    engine.observe(10, {'disk': 90})
+    assert len(sent) == 1 and 'FIRING' in sent[0]
+
+def test_alert_state_survives_leader_change(tmp_path):
+    from utils.alerts import AlertEngine
+
+    path = str(tmp_path / 'alerts.json')
+    sent_a, sent_b, sent_c = [], [], []
+    engine_a = AlertEngine(RULES, sent_a.append, group_wait=0, state_path=path)
+    engine_a.observe(0, {'disk': 90})
+    assert len(sent_a) == 1
+
+    # Still firing on the new leader: not announced again
+    engine_b = AlertEngine(RULES, sent_b.append, group_wait=0, state_path=path)
+    engine_b.observe(100, {'disk': 90})
+    assert sent_b == [] and [a['name'] for a in engine_b.active()] == ['Disk']
+
+    # Back under the threshold on another leader: resolved and rewritten
+    engine_c = AlertEngine(RULES, sent_c.append, group_wait=0, state_path=path)
+    engine_c.observe(200, {'disk': 50})
+    assert len(sent_c) == 1 and 'RESOLVED' in sent_c[0]
+    with open(path) as f:
+        assert json.load(f)['firing'] == []
+
+def test_alert_unsent_queue_survives_leader_change(tmp_path):
+    from utils.alerts import AlertEngine
+
+    path = str(tmp_path / 'alerts.json')
+    engine_a = AlertEngine(RULES, [].append, group_wait=30, state_path=path)
+    engine_a.observe(0, {'disk': 90})
+
+    sent = []
+    engine_b = AlertEngine(RULES, sent.append, group_wait=30, state_path=path)
+    engine_b.observe(30, {'disk': 90})
+    assert len(sent) == 1 and 'FIRING' in sent[0]
+
+# Form validation
+
+CONTACT_FORMS = [
+    {'name': 'Seeker', 'email': 'seeker@example.com', 'message': 'Tell me more about the temple.'},
+    {'name': 'Winner', 'email': 'promo@example.com', 'message': 'Winner! Claim your prize at the casino.'},
+    {'message': ''},
+    {'message': '   '},
+    {'name': 'n' * 101, 'email': 'bad@', 'message': 'x' * 5001}
+]
+
+def test_validators_match_legacy():
+    import random
+    from tests.benchmarks.legacy import (
+        legacy_sanitize_input, legacy_validate_contact_form, legacy_validate_email, legacy_validate_message
+    )
+    from utils.validators import sanitize_input, validate_contact_form, validate_email, validate_message
+
+    rng = random.Random(42)
+    alphabet = 'abc <>"\'/&\n\t@.xyzCASINOwinnerprizeıſ'
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        assert sanitize_input(text) == legacy_sanitize_input(text)
+        assert validate_email(text) == legacy_validate_email(text)
+        assert validate_message(text) == legacy_validate_message(text)
+        form = {'name': text[:120], 'email': text[:30], 'message': text}
+        assert validate_contact_form(form) == legacy_validate_contact_form(form)
+
+    for form in CONTACT_FORMS:
+        assert validate_contact_form(form) == legacy_validate_contact_form(form)
+
+def test_spam_score_matches_regexes():
+    import random
+    from utils.validators import SPAM_RULES, spam_score
+
+    def regex_only(message):
+        return [name for name, _, pattern, _ in SPAM_RULES if pattern.search(message)]
+
+    # (?i) folds these non-ASCII letters onto ASCII ones; str.lower() does not
+    for message in ('vıagra', 'caſino', 'VİAGRA', 'wınner ſpecial prıze', 'ℂasino'):
+        assert spam_score(message)[1] == regex_only(message)
+    assert spam_score('caſino')[0] == 2
+
+    rng = random.Random(7)
+    alphabet = 'viagrcasnowpzeklhVIAGRCASNOıſİK .'
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        assert spam_score(text)[1] == regex_only(text)
+
+def test_validate_contact_forms_matches_single():
+    from utils.validators import spam_score, validate_contact_form, validate_contact_forms
+
+    results = validate_contact_forms(CONTACT_FORMS)
+    assert [r[:2] for r in results] == [validate_contact_form(form) for form in CONTACT_FORMS]
+    assert [r[2] for r in results] == [0, 4, 0, 0, 0]
+    assert spam_score('winner: casino prize') == (4, ['casino', 'winner_prize'])
+    assert spam_score('Click it HERE right NOW') == (1, ['click_here_now'])
+
+def test_message_errors_shared():
+    from utils.validators import validate_contact_form, validate_message
+
+    for message in ('', '   ', 'x' * 5001):
+        valid, error = validate_message(message)
+        assert not valid
+        assert validate_contact_form({'message': message})[1]['message'] == error
+
+# Connectivity prober
+
+@pytest.fixture
+def http_server():
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(500 if self.path == '/broken' else 302)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+def _closed_port():
+    import socket
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_probe_times_tcp_and_http(http_server):
+    from utils.connectivity import ProbeTarget
+
+    result = ProbeTarget('web', f'http://{http_server}/login').probe(timeout=2)
+    assert result['ok'] and result['status'] == 302 and result['error'] is None
+    assert result['phase'] == 'http'
+    assert set(result['ms']) == {'tcp', 'http'}
+
+    broken = ProbeTarget('web', f'http://{http_server}/broken').probe(timeout=2)
+    assert not broken['ok'] and broken['status'] == 500 and broken['error'] == 'HTTP 500'
+
+def test_probe_reports_failed_phase(http_server):
+    from utils.connectivity import ProbeTarget
+
+    refused = ProbeTarget('down', f'http://127.0.0.1:{_closed_port()}/').probe(timeout=2)
+    assert not refused['ok'] and refused['phase'] == 'tcp' and refused['ms'] == {}
+
+    # A plain HTTP server fails the TLS handshake after the TCP connect
+    tls = ProbeTarget('tls', f'https://{http_server}/').probe(timeout=2)
+    assert not tls['ok'] and tls['phase'] == 'tls' and set(tls['ms']) == {'tcp'}
+
+def test_prober_writes_percentiles(http_server, tmp_path):
+    from utils.connectivity import ConnectivityProber
+
+    path = str(tmp_path / 'connectivity.json')
+    prober = ConnectivityProber([
+        {'name': 'web', 'url': f'http://{http_server}/'},
+        {'name': 'down', 'url': f'http://127.0.0.1:{_closed_port()}/'},
+        {'name': 'unset', 'url': ''}
+    ], timeout=2, window=3, state_path=path)
+    for _ in range(5):
+        prober.run_once()
+
+    with open(path) as f:
+        web, down = json.load(f)['targets']
+    assert web['up'] and web['checks'] == 5 and web['failures'] == 0
+    assert web['latency']['http']['count'] == 3
+    assert set(web['latency']['http']) == {'p50', 'p90', 'p99', 'count'}
+    assert not down['up'] and down['failed_phase'] == 'tcp' and down['latency'] == {}
+
+def test_connectivity_state_marks_stale_targets_down(http_server, tmp_path, monkeypatch):
+    import time
+    from flask import Flask
+    from utils.connectivity import ConnectivityProber, get_connectivity_state
+
+    app = Flask(__name__)
+    app.config.update(DATA_DIR=str(tmp_path), CONNECTIVITY_INTERVAL=15)
+    prober = ConnectivityProber([{'name': 'web', 'url': f'http://{http_server}/'}],
+                                timeout=2, state_path=str(tmp_path / 'connectivity.json'))
+    prober.run_once()
+
+    with app.app_context():
+        state = get_connectivity_state()
+        assert not state['stale'] and state['targets'][0]['up']
+
+        # The prober has not written for more than three intervals
+        now = time.time() + 60
+        monkeypatch.setattr(time, 'time', lambda: now)
+        state = get_connectivity_state()
+        assert state['stale']
+        assert not state['targets'][0]['up'] and state['targets'][0]['error'] == 'stale'
+        assert state['targets'][0]['latency']['http']['count'] == 1
+
+def test_percentile_nearest_rank():
+    from utils.stats import percentile
+
+    assert percentile([], 50) is None
+    assert percentile([], 50, 0.0) == 0.0
+    assert percentile([5], 99) == 5
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile(list(range(1, 11)), 95) == 10
+    assert percentile(list(range(1, 11)), 0) == 1
@@ -0,0 +1,300 @@
+"""
+Threshold alerting
+Evaluates declarative rules incrementally against each local metric sample
+and sends grouped, deduplicated Telegram notifications
+"""
+
+import os
+import math
+import operator
+import logging
+
+from flask import current_app
+
+from utils.background import start_leader_task, write_json_state, read_json_state
+from utils.prometheus import query_prometheus
+from utils.telegram import send_telegram_message
+from utils.timeseries import HostSampler, add_sample_listener
+
+logger = logging.getLogger(__name__)
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq
+}
+
+class AlertRule:
+    """
+    One threshold rule
+
+    A rule fires once its condition has held for `for` seconds and
+    resolves when the value no longer satisfies the condition against
+    `clear`. Setting clear below the threshold (for '>') gives hysteresis.
+    """
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.metric = spec['metric']
+        self.op = spec.get('op', '>')
+        if self.op not in OPERATORS:
+            raise ValueError(f"Unknown operator in alert rule {self.name}: {self.op}")
+        self.threshold = float(spec['threshold'])
+        self.clear = float(spec.get('clear', self.threshold))
+        self.duration = spec.get('for', 0)
+        self.severity = spec.get('severity', 'warning')
+
+    def breached(self, value):
+        return OPERATORS[self.op](value, self.threshold)
+
+    def cleared(self, value):
+        return not OPERATORS[self.op](value, self.clear)
+
+class _RuleState:
+    __slots__ = ('pending_since', 'firing', 'fired_at', 'notified_at', 'value')
+
+    def __init__(self):
+        self.pending_since = None
+        self.firing = False
+        self.fired_at = None
+        self.notified_at = None
+        self.value = None
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def load(self, data):
+        for slot in self.__slots__:
+            setattr(self, slot, data.get(slot))
+        self.firing = bool(self.firing)
+        # Only written on state changes, so it may be stale; restart the wait
+        self.pending_since = None
+
+class AlertEngine:
+    """
+    Incremental rule evaluator with grouped notifications
+
+    Each observe() call costs O(rules). State transitions are queued and
+    sent as one message once the oldest queued event is group_wait
+    seconds old. An alert that fires and resolves inside one group
+    window is never sent. Firing alerts are re-sent every repeat_interval.
+
+    Rule states and the unsent queue are persisted to state_path and
+    reloaded on the first observe(), so a worker that takes over as
+    leader resolves alerts it did not fire and does not re-announce
+    alerts that are still firing.
+    """
+
+    def __init__(self, rules, notify, group_wait=30, repeat_interval=4 * 3600, state_path=None):
+        self.rules = [AlertRule(spec) for spec in rules]
+        self.notify = notify
+        self.group_wait = group_wait
+        self.repeat_interval = repeat_interval
+        self.state_path = state_path
+
+        self._states = {rule.name: _RuleState() for rule in self.rules}
+        self._queue = {}
+        self._queue_started = None
+        self._loaded = False
+
+    def observe(self, timestamp, values):
+        """
+        Update rule states with one sample and flush due notifications
+
+        Args:
+            timestamp: Sample time in seconds since epoch
+            values: Dict of metric name to value; missing or NaN values
+                leave the rule state unchanged
+        """
+        if not self._loaded:
+            self._load_state()
+            self._loaded = True
+
+        changed = False
+        for rule in self.rules:
+            value = values.get(rule.metric)
+            if value is None or math.isnan(value):
+                continue
+
+            state = self._states[rule.name]
+            state.value = value
+
+            if not state.firing:
+                if not rule.breached(value):
+                    state.pending_since = None
+                    continue
+                if state.pending_since is None:
+                    state.pending_since = timestamp
+                if timestamp - state.pending_since >= rule.duration:
+                    state.firing = True
+                    state.fired_at = timestamp
+                    self._enqueue(rule, 'firing', timestamp)
+                    changed = True
+            elif rule.cleared(value):
+                state.firing = False
+                state.pending_since = None
+                changed = True
+                if state.notified_at is None:
+                    # Never announced, so there is nothing to resolve
+                    self._queue.pop(rule.name, None)
+                else:
+                    self._enqueue(rule, 'resolved', timestamp)
+                state.notified_at = None
+            elif state.notified_at is not None and timestamp - state.notified_at >= self.repeat_interval:
+                self._enqueue(rule, 'firing', timestamp)
+                changed = True
+
+        if self._queue and timestamp - self._queue_started >= self.group_wait:
+            changed = self._flush(timestamp) or changed
+
+        if changed:
+            self._write_state(timestamp)
+
+    def _enqueue(self, rule, status, timestamp):
+        if not self._queue:
+            self._queue_started = timestamp
+        self._queue[rule.name] = (rule, status)
+
+    def _flush(self, timestamp):
+        lines = ['🔷 Blue Djedi alerts']
+        for rule, status in self._queue.values():
+            value = self._states[rule.name].value
+            if status == 'firing':
+                lines.append(f"🔥 FIRING [{rule.severity}] {rule.name}: {rule.metric} = {value:.1f} ({rule.op} {rule.threshold:g})")
+            else:
+                lines.append(f"✅ RESOLVED {rule.name}: {rule.metric} = {value:.1f}")
+
+        try:
+            self.notify('\n'.join(lines))
+        except Exception as e:
+            # Keep the queue so the next sample retries
+            logger.error(f"Error sending alert notification: {e}")
+            return False
+
+        for rule, status in self._queue.values():
+            if status == 'firing':
+                self._states[rule.name].notified_at = timestamp
+        self._queue = {}
+        self._queue_started = None
+        return True
+
+    def active(self):
+        """
+        Currently firing alerts
+
+        Returns:
+            list: Dicts with name, metric, value, severity and since
+        """
+        firing = []
+        for rule in self.rules:
+            state = self._states[rule.name]
+            if state.firing:
+                firing.append({
+                    'name': rule.name,
+                    'metric': rule.metric,
+                    'value': state.value,
+                    'severity': rule.severity,
+                    'since': state.fired_at
+                })
+        return firing
+
+    def _write_state(self, timestamp):
+        if not self.state_path:
+            return
+        try:
+            write_json_state(self.state_path, {
+                'updated': timestamp,
+                'firing': self.active(),
+                'rules': {name: state.to_dict() for name, state in self._states.items()},
+                'queue': [[rule.name, status] for rule, status in self._queue.values()],
+                'queue_started': self._queue_started
+            })
+        except OSError as e:
+            logger.error(f"Error writing alert state: {e}")
+
+    def _load_state(self):
+        """Restore rule states and unsent notifications written by a previous leader"""
+        if not self.state_path:
+            return
+        saved = read_json_state(self.state_path) or {}
+
+        for name, data in saved.get('rules', {}).items():
+            if name in self._states:
+                self._states[name].load(data)
+
+        rules = {rule.name: rule for rule in self.rules}
+        for name, status in saved.get('queue', []):
+            if name in rules:
+                self._queue[name] = (rules[name], status)
+        if self._queue:
+            self._queue_started = saved.get('queue_started')
+
+def _notify_telegram(text):
+    response = send_telegram_message(text)
+    if response.status_code != 200:
+        raise RuntimeError(f"Telegram API error: {response.status_code}")
+
+def init_alerts(app):
+    """
+    Evaluate ALERT_RULES after every local sample in the sampler worker
+
+    Service rules use metrics named 'up:<job>', filled from a single
+    Prometheus `up` query every ALERT_SERVICE_CHECK_INTERVAL seconds.
+    Without the local time-series sampler, alerts take their own host
+    samples in a separate elected worker.
+
+    Args:
+        app: Flask application
+    """
+    config = app.config
+    if not config.get('ALERTS_ENABLED') or 'alerts' in app.extensions:
+        return
+
+    engine = AlertEngine(
+        config['ALERT_RULES'],
+        _notify_telegram,
+        group_wait=config['ALERT_GROUP_WAIT'],
+        repeat_interval=config['ALERT_REPEAT_INTERVAL'],
+        state_path=os.path.join(config['DATA_DIR'], 'alerts.json')
+    )
+    app.extensions['alerts'] = engine
+
+    service_values = {}
+    last_service_check = [0.0]
+
+    def evaluate(timestamp, values):
+        if timestamp - last_service_check[0] >= config['ALERT_SERVICE_CHECK_INTERVAL']:
+            last_service_check[0] = timestamp
+            service_values.clear()
+            data = query_prometheus('up')
+            if data is None:
+                service_values['up:prometheus'] = 0.0
+            else:
+                for result in data.get('result', []):
+                    job = result.get('metric', {}).get('job', '')
+                    service_values[f'up:{job}'] = float(result.get('value', [0, 0])[1])
+
+        engine.observe(timestamp, {**values, **service_values})
+
+    if config.get('TIMESERIES_ENABLED'):
+        add_sample_listener(app, evaluate)
+        return
+
+    logger.info("Local time-series sampling is off; alerts use their own sampler")
+    sampler = HostSampler()
+    start_leader_task(
+        app, 'alert-evaluator', config['TIMESERIES_SAMPLE_INTERVAL'], lambda: evaluate(*sampler()),
+        os.path.join(config['DATA_DIR'], '.alerts.lock')
+    )
+
+def get_alert_state():
+    """
+    Firing alerts as last written by the sampler worker
+
+    Returns:
+        dict: 'updated' timestamp and 'firing' list
+    """
+    state = read_json_state(os.path.join(current_app.config['DATA_DIR'], 'alerts.json')) or {}
+    return {'updated': state.get('updated'), 'firing': state.get('firing', [])}
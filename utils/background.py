@@ -0,0 +1,137 @@
+"""
+Background task utilities
+Periodic worker threads that run in a single elected gunicorn worker
+"""
+
+import os
+import json
+import fcntl
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LeaderLock:
+    """
+    Non-blocking exclusive file lock used to elect one worker process
+
+    The lock is released by the kernel when the holding process exits,
+    so another worker takes over on its next attempt.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    @property
+    def held(self):
+        return self._fd is not None
+
+    def try_acquire(self):
+        """
+        Attempt to take the lock without blocking
+
+        Returns:
+            bool: True if this process holds the lock
+        """
+        if self._fd is not None:
+            return True
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.error(f"Cannot open leader lock {self.path}: {e}")
+            return False
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        """Release the lock if held"""
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+def start_leader_task(app, name, interval, func, lock_path):
+    """
+    Run func every interval seconds in whichever worker holds lock_path
+
+    Every worker starts a daemon thread; non-leaders keep retrying the
+    lock so the task moves to a surviving worker if the leader dies.
+
+    Args:
+        app: Flask application (func runs inside its app context)
+        name: Thread name, used in logs
+        interval: Seconds between runs
+        func: Callable taking no arguments
+        lock_path: Path of the lock file shared by all workers
+
+    Returns:
+        threading.Thread: The started thread
+    """
+    lock = LeaderLock(lock_path)
+
+    def run():
+        while True:
+            started = time.monotonic()
+            if lock.try_acquire():
+                try:
+                    with app.app_context():
+                        func()
+                except Exception as e:
+                    logger.error(f"Background task {name} failed: {e}")
+            elapsed = time.monotonic() - started
+            time.sleep(max(interval - elapsed, 0.1))
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    logger.info(f"Started background task {name} (pid {os.getpid()})")
+    return thread
+
+def write_json_state(path, data):
+    """
+    Atomically replace a JSON state file shared between workers
+
+    Readers never see a partial file: data goes to a temporary file that
+    is renamed over path.
+
+    Args:
+        path: Destination file
+        data: JSON-serialisable object
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def read_json_state(path, default=None):
+    """
+    Read a JSON state file written by write_json_state
+
+    Args:
+        path: State file
+        default: Returned if the file is missing or unreadable
+
+    Returns:
+        object: Parsed JSON or default
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
@@ -0,0 +1,345 @@
+"""
+Host metrics collector
+Per-interface, per-disk and per-mount statistics with rates computed from
+counter deltas. Per-device state lives in __slots__ objects backed by
+preallocated arrays that are updated in place on every sample.
+"""
+
+import os
+import time
+import threading
+import logging
+from array import array
+
+import psutil
+from flask import current_app
+
+from utils.background import start_leader_task, write_json_state, read_json_state
+from utils.profiling import traced
+
+logger = logging.getLogger(__name__)
+
+# Pseudo filesystems that never hold user data
+IGNORED_FSTYPES = frozenset(('tmpfs', 'devtmpfs', 'squashfs', 'proc', 'sysfs', 'cgroup', 'cgroup2'))
+
+# Virtual block devices excluded from disk I/O
+IGNORED_DISK_PREFIXES = ('loop', 'ram', 'zram')
+
+# How often the mount table is re-read (it rarely changes)
+MOUNT_REFRESH_SECONDS = 60
+
+def _update_rates(prev, rates, current, dt, primed):
+    """Store per-second deltas of current vs prev into rates, then roll prev"""
+    for i, value in enumerate(current):
+        if primed and dt > 0:
+            # Counters can reset (interface down/up); treat that as zero
+            rates[i] = max(value - prev[i], 0) / dt
+        else:
+            rates[i] = 0.0
+        prev[i] = value
+
+class InterfaceStats:
+    """Counters and rates for one network interface"""
+
+    __slots__ = ('name', 'totals', 'rates', 'primed')
+
+    # Order of values in totals/rates
+    FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv', 'errin', 'errout', 'dropin', 'dropout')
+
+    def __init__(self, name):
+        self.name = name
+        self.totals = array('d', bytes(8 * len(self.FIELDS)))
+        self.rates = array('d', bytes(8 * len(self.FIELDS)))
+        self.primed = False
+
+    def update(self, counters, dt):
+        _update_rates(self.totals, self.rates, counters, dt, self.primed)
+        self.primed = True
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'bytes_sent': int(self.totals[0]),
+            'bytes_recv': int(self.totals[1]),
+            'tx_bytes_per_sec': round(self.rates[0], 1),
+            'rx_bytes_per_sec': round(self.rates[1], 1),
+            'tx_packets_per_sec': round(self.rates[2], 1),
+            'rx_packets_per_sec': round(self.rates[3], 1),
+            'errors_per_sec': round(self.rates[4] + self.rates[5], 2),
+            'drops_per_sec': round(self.rates[6] + self.rates[7], 2)
+        }
+
+class DiskStats:
+    """Counters and rates for one block device"""
+
+    __slots__ = ('name', 'totals', 'rates', 'primed')
+
+    FIELDS = ('read_count', 'write_count', 'read_bytes', 'write_bytes')
+
+    def __init__(self, name):
+        self.name = name
+        self.totals = array('d', bytes(8 * len(self.FIELDS)))
+        self.rates = array('d', bytes(8 * len(self.FIELDS)))
+        self.primed = False
+
+    def update(self, counters, dt):
+        _update_rates(self.totals, self.rates, counters, dt, self.primed)
+        self.primed = True
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'read_iops': round(self.rates[0], 1),
+            'write_iops': round(self.rates[1], 1),
+            'read_bytes_per_sec': round(self.rates[2], 1),
+            'write_bytes_per_sec': round(self.rates[3], 1)
+        }
+
+class MountStats:
+    """Usage of one mounted filesystem"""
+
+    __slots__ = ('mountpoint', 'device', 'fstype', 'usage')
+
+    def __init__(self, mountpoint, device, fstype):
+        self.mountpoint = mountpoint
+        self.device = device
+        self.fstype = fstype
+        self.usage = array('d', bytes(8 * 4))  # total, used, free, percent
+
+    def update(self, usage):
+        self.usage[0] = usage.total
+        self.usage[1] = usage.used
+        self.usage[2] = usage.free
+        self.usage[3] = usage.percent
+
+    def to_dict(self):
+        return {
+            'mountpoint': self.mountpoint,
+            'device': self.device,
+            'fstype': self.fstype,
+            'total': int(self.usage[0]),
+            'used': int(self.usage[1]),
+            'free': int(self.usage[2]),
+            'percent': self.usage[3]
+        }
+
+class HostCollector:
+    """
+    Tracks every interface, block device and mount between samples
+
+    Device objects are created once and reused; only devices that appear
+    or disappear cause allocation of per-device state.
+    """
+
+    def __init__(self):
+        self.interfaces = {}
+        self.disks = {}
+        self.mounts = {}
+        self.last_sample = None
+        self._last_mount_refresh = 0.0
+        self._lock = threading.Lock()
+
+    @traced('psutil.host_collector')
+    def sample(self, min_interval=0.0):
+        """
+        Refresh all counters and rates
+
+        Args:
+            min_interval: Skip the sample if the previous one is newer than this
+
+        Returns:
+            HostCollector: self, for chaining
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.last_sample is not None and now - self.last_sample < min_interval:
+                return self
+
+            dt = now - self.last_sample if self.last_sample is not None else 0.0
+            self.last_sample = now
+
+            self._sample_interfaces(dt)
+            self._sample_disks(dt)
+            if now - self._last_mount_refresh >= MOUNT_REFRESH_SECONDS or not self.mounts:
+                self._refresh_mounts()
+                self._last_mount_refresh = now
+            self._sample_mounts()
+        return self
+
+    def _sample_interfaces(self, dt):
+        try:
+            counters = psutil.net_io_counters(pernic=True)
+        except Exception as e:
+            logger.error(f"Error reading network counters: {e}")
+            return
+
+        _sync_devices(self.interfaces, counters, InterfaceStats)
+        for name, stats in self.interfaces.items():
+            stats.update(counters[name], dt)
+
+    def _sample_disks(self, dt):
+        try:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+        except Exception as e:
+            logger.error(f"Error reading disk counters: {e}")
+            return
+
+        counters = {
+            name: (c.read_count, c.write_count, c.read_bytes, c.write_bytes)
+            for name, c in counters.items() if not name.startswith(IGNORED_DISK_PREFIXES)
+        }
+        _sync_devices(self.disks, counters, DiskStats)
+        for name, stats in self.disks.items():
+            stats.update(counters[name], dt)
+
+    def _refresh_mounts(self):
+        try:
+            partitions = psutil.disk_partitions(all=False)
+        except Exception as e:
+            logger.error(f"Error reading mount table: {e}")
+            return
+
+        seen = set()
+        for part in partitions:
+            if part.fstype in IGNORED_FSTYPES:
+                continue
+            seen.add(part.mountpoint)
+            if part.mountpoint not in self.mounts:
+                self.mounts[part.mountpoint] = MountStats(part.mountpoint, part.device, part.fstype)
+
+        for mountpoint in list(self.mounts):
+            if mountpoint not in seen:
+                del self.mounts[mountpoint]
+
+    def _sample_mounts(self):
+        for mountpoint, stats in list(self.mounts.items()):
+            try:
+                stats.update(psutil.disk_usage(mountpoint))
+            except OSError:
+                # Unmounted between refreshes
+                del self.mounts[mountpoint]
+
+    def network_rate(self, include_loopback=False):
+        """
+        Total bytes/s across interfaces
+
+        Args:
+            include_loopback: Count the lo interface as well
+
+        Returns:
+            float: Transmit + receive bytes per second
+        """
+        total = 0.0
+        for name, stats in self.interfaces.items():
+            if name == 'lo' and not include_loopback:
+                continue
+            total += stats.rates[0] + stats.rates[1]
+        return total
+
+    def to_dict(self):
+        """
+        JSON-ready snapshot of the latest sample
+
+        Returns:
+            dict: Lists of interfaces, disks and mounts
+        """
+        with self._lock:
+            return {
+                'interfaces': [s.to_dict() for s in self.interfaces.values()],
+                'disks': [s.to_dict() for s in self.disks.values()],
+                'mounts': [s.to_dict() for s in self.mounts.values()]
+            }
+
+def _sync_devices(devices, counters, factory):
+    """Add state for new devices and drop state for vanished ones"""
+    if len(devices) == len(counters) and all(name in devices for name in counters):
+        return
+    for name in counters:
+        if name not in devices:
+            devices[name] = factory(name)
+    for name in list(devices):
+        if name not in counters:
+            del devices[name]
+
+_collector = None
+_collector_lock = threading.Lock()
+
+def get_collector():
+    """
+    Get the per-process collector
+
+    Returns:
+        HostCollector: Shared collector instance
+    """
+    global _collector
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                _collector = HostCollector()
+    return _collector
+
+def get_host_details(min_interval=1.0):
+    """
+    Sample (at most once per min_interval) and return per-device details
+
+    Args:
+        min_interval: Minimum seconds between samples in this process
+
+    Returns:
+        dict: Interfaces, disks and mounts with rates
+    """
+    return get_collector().sample(min_interval).to_dict()
+
+def init_host_collector(app):
+    """
+    Prime this worker's collector and keep shared host details fresh
+
+    Rates need two samples, so the first one is taken at start-up rather
+    than by the first request. With HOST_SAMPLING_ENABLED the elected
+    worker samples every HOST_SAMPLE_INTERVAL seconds and writes the
+    details to RUNTIME_DIR/host.json for all workers.
+
+    Args:
+        app: Flask application
+    """
+    if 'host_collector' in app.extensions:
+        return
+
+    config = app.config
+    collector = get_collector()
+    app.extensions['host_collector'] = collector
+    collector.sample()
+
+    if not config.get('HOST_SAMPLING_ENABLED'):
+        return
+
+    path = os.path.join(config['RUNTIME_DIR'], 'host.json')
+
+    def sample():
+        details = collector.sample().to_dict()
+        try:
+            write_json_state(path, {'updated': time.time(), **details})
+        except OSError as e:
+            logger.error(f"Error writing host state: {e}")
+
+    start_leader_task(
+        app, 'host-collector', config['HOST_SAMPLE_INTERVAL'], sample,
+        os.path.join(config['DATA_DIR'], '.host.lock')
+    )
+
+def get_host_state():
+    """
+    Host details as last written by the collector worker
+
+    Returns:
+        dict: Interfaces, disks and mounts with rates, or None if
+            background sampling is off or its state is stale
+    """
+    config = current_app.config
+    if not config.get('HOST_SAMPLING_ENABLED'):
+        return None
+
+    state = read_json_state(os.path.join(config['RUNTIME_DIR'], 'host.json'))
+    if not state or time.time() - state.get('updated', 0) > 3 * config['HOST_SAMPLE_INTERVAL'] + 5:
+        return None
+    return state
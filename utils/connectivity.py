@@ -0,0 +1,217 @@
+"""
+Connectivity prober
+Server-side TCP connect, TLS handshake and HTTP response timing for the
+dashboard's service links, run on one schedule in the elected worker
+"""
+
+import os
+import ssl
+import time
+import socket
+import logging
+import http.client
+from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from utils.background import start_leader_task, write_json_state, read_json_state
+from utils.stats import percentile
+
+logger = logging.getLogger(__name__)
+
+# Timed phases of one probe, in the order they happen
+PHASES = ('tcp', 'tls', 'http')
+
+# Reported latency percentiles
+PERCENTILES = (50, 90, 99)
+
+class ProbeTarget:
+    """One probed URL with a rolling window of phase timings"""
+
+    __slots__ = ('name', 'url', 'scheme', 'host', 'port', 'path', 'samples',
+                 'last', 'checks', 'failures')
+
+    def __init__(self, name, url, window=60):
+        parts = urlsplit(url)
+        self.name = name
+        self.url = url
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.scheme == 'https' else 80)
+        self.path = parts.path or '/'
+        if parts.query:
+            self.path += '?' + parts.query
+        self.samples = {phase: deque(maxlen=window) for phase in PHASES}
+        self.last = None
+        self.checks = 0
+        self.failures = 0
+
+    def probe(self, timeout, ssl_context=None):
+        """
+        Time one connection: TCP connect, TLS handshake (https only) and
+        HTTP request to the status line, all on the same socket
+
+        Args:
+            timeout: Socket timeout in seconds, per phase
+            ssl_context: SSL context for https targets
+
+        Returns:
+            dict: 'ok', 'phase' reached, per-phase 'ms', 'status' and 'error'
+        """
+        result = {'ok': False, 'phase': 'tcp', 'ms': {}, 'status': None, 'error': None}
+        sock = None
+        try:
+            started = time.perf_counter()
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+            result['ms']['tcp'] = (time.perf_counter() - started) * 1000
+
+            if self.scheme == 'https':
+                result['phase'] = 'tls'
+                started = time.perf_counter()
+                sock = (ssl_context or ssl.create_default_context()).wrap_socket(sock, server_hostname=self.host)
+                result['ms']['tls'] = (time.perf_counter() - started) * 1000
+
+            result['phase'] = 'http'
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+            conn.sock = sock
+            started = time.perf_counter()
+            conn.request('GET', self.path, headers={'Connection': 'close', 'User-Agent': 'vps-connectivity'})
+            response = conn.getresponse()
+            result['ms']['http'] = (time.perf_counter() - started) * 1000
+            response.close()
+
+            result['status'] = response.status
+            # Any answer below 500 means the service is up (auth pages count)
+            result['ok'] = response.status < 500
+            if not result['ok']:
+                result['error'] = f"HTTP {response.status}"
+        except (OSError, http.client.HTTPException) as e:
+            result['error'] = str(e) or e.__class__.__name__
+        finally:
+            if sock is not None:
+                sock.close()
+        return result
+
+    def record(self, timestamp, result):
+        self.checks += 1
+        if not result['ok']:
+            self.failures += 1
+        for phase, ms in result['ms'].items():
+            self.samples[phase].append(ms)
+        self.last = {**result, 'timestamp': timestamp}
+
+    def to_dict(self):
+        latency = {}
+        for phase, samples in self.samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            latency[phase] = {f'p{pct}': round(percentile(ordered, pct), 1) for pct in PERCENTILES}
+            latency[phase]['count'] = len(ordered)
+
+        last = self.last or {}
+        return {
+            'name': self.name,
+            'url': self.url,
+            'up': bool(last.get('ok')),
+            'status': last.get('status'),
+            'error': last.get('error'),
+            'failed_phase': None if last.get('ok', True) else last.get('phase'),
+            'checked': last.get('timestamp'),
+            'last_ms': {phase: round(ms, 1) for phase, ms in last.get('ms', {}).items()},
+            'latency': latency,
+            'checks': self.checks,
+            'failures': self.failures
+        }
+
+class ConnectivityProber:
+    """
+    Probes every target concurrently and writes the results to one file
+
+    Readers (any worker, any number of tabs) only read the file, so the
+    probe rate is fixed by the schedule.
+    """
+
+    def __init__(self, targets, timeout=3.0, window=60, state_path=None, verify_tls=True):
+        self.targets = [ProbeTarget(t['name'], t['url'], window) for t in targets if t.get('url')]
+        self.timeout = timeout
+        self.state_path = state_path
+        self.ssl_context = ssl.create_default_context()
+        if not verify_tls:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.targets), 1), thread_name_prefix='probe')
+
+    def run_once(self):
+        """
+        Probe all targets and persist the results
+
+        Returns:
+            dict: 'updated' timestamp and one entry per target
+        """
+        timestamp = time.time()
+        results = self._executor.map(lambda t: t.probe(self.timeout, self.ssl_context), self.targets)
+        for target, result in zip(self.targets, results):
+            target.record(timestamp, result)
+
+        state = {'updated': timestamp, 'targets': [t.to_dict() for t in self.targets]}
+        self._write_state(state)
+        return state
+
+    def _write_state(self, state):
+        if not self.state_path:
+            return
+        try:
+            write_json_state(self.state_path, state)
+        except OSError as e:
+            logger.error(f"Error writing connectivity state: {e}")
+
+def init_connectivity(app):
+    """
+    Start probing CONNECTIVITY_TARGETS in the elected worker
+
+    Args:
+        app: Flask application
+    """
+    config = app.config
+    if not config.get('CONNECTIVITY_ENABLED') or 'connectivity' in app.extensions:
+        return
+
+    prober = ConnectivityProber(
+        config['CONNECTIVITY_TARGETS'],
+        timeout=config['CONNECTIVITY_TIMEOUT'],
+        window=config['CONNECTIVITY_WINDOW'],
+        state_path=os.path.join(config['DATA_DIR'], 'connectivity.json'),
+        verify_tls=config['CONNECTIVITY_VERIFY_TLS']
+    )
+    app.extensions['connectivity'] = prober
+
+    start_leader_task(
+        app, 'connectivity-prober', config['CONNECTIVITY_INTERVAL'], prober.run_once,
+        os.path.join(config['DATA_DIR'], '.connectivity.lock')
+    )
+
+def get_connectivity_state():
+    """
+    Probe results as last written by the prober worker
+
+    If the prober has stopped writing (no leader, or its thread died), the
+    last results are kept for their latency history but every target is
+    reported down with error 'stale'.
+
+    Returns:
+        dict: 'updated' timestamp, 'stale' flag and 'targets' list
+    """
+    config = current_app.config
+    path = os.path.join(config['DATA_DIR'], 'connectivity.json')
+    state = read_json_state(path, {'updated': None, 'targets': []})
+
+    updated = state.get('updated')
+    state['stale'] = updated is None or time.time() - updated > 3 * config['CONNECTIVITY_INTERVAL'] + 5
+    if state['stale']:
+        for target in state.get('targets', []):
+            target['up'] = False
+            target['error'] = 'stale'
+    return state
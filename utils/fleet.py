@@ -0,0 +1,168 @@
+"""
+Fleet view
+Per-node summary across several VPS nodes, built from Prometheus results
+grouped by instance and from other nodes' /api/system snapshots
+"""
+
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+from utils.panels import query_panels
+
+logger = logging.getLogger(__name__)
+
+# Columns of the summary table, in display order
+SUMMARY_COLUMNS = ('name', 'source', 'up', 'cpu', 'memory', 'disk', 'network', 'uptime', 'error')
+
+def _empty_row(name, source):
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row['name'] = name
+    row['source'] = source
+    return row
+
+def _fetch_agent(node, timeout):
+    """Fetch one node's /api/system snapshot and reduce it to a summary row"""
+    row = _empty_row(node['name'], 'agent')
+    started = time.perf_counter()
+    try:
+        response = requests.get(f"{node['url'].rstrip('/')}/api/system", timeout=timeout)
+        response.raise_for_status()
+        system = response.json()
+    except (requests.RequestException, ValueError) as e:
+        row['up'] = False
+        row['error'] = str(e)
+        return row
+
+    row['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    if not isinstance(system, dict):
+        row['up'] = False
+        row['error'] = 'invalid response'
+        return row
+    if 'error' in system:
+        row['up'] = False
+        row['error'] = str(system['error'])
+        return row
+
+    row['up'] = True
+    for key in ('cpu', 'memory', 'disk'):
+        section = system.get(key)
+        row[key] = section.get('percent') if isinstance(section, dict) else None
+    row['uptime'] = system.get('uptime_short')
+    return row
+
+def _prometheus_rows(panels, nodes):
+    """
+    One batched instant query for all fleet panels, pivoted by instance
+
+    Panels must aggregate `by (instance)`; each panel's name becomes a
+    column. Instances listed on a node (node['instance']) take that
+    node's name.
+    """
+    names = {node['instance']: node['name'] for node in nodes if node.get('instance')}
+    rows = {}
+
+    results = query_panels(panels)
+    for panel in panels:
+        data = results.get(panel['name'])
+        if not data:
+            continue
+        scale = panel.get('scale', 1)
+        for series in data.get('result', []):
+            instance = series.get('metric', {}).get('instance')
+            if instance is None:
+                continue
+            row = rows.get(instance)
+            if row is None:
+                row = rows[instance] = _empty_row(names.get(instance, instance), 'prometheus')
+                row['instance'] = instance
+            value = float(series.get('value', [0, 0])[1]) * scale
+            if panel['name'] == 'up':
+                row['up'] = value == 1
+            else:
+                row[panel['name']] = round(value, panel.get('precision', 1))
+
+    return rows
+
+def get_fleet_summary(panels, nodes, timeout=3.0):
+    """
+    Build the per-node summary table
+
+    The Prometheus query and every agent fetch run concurrently on a
+    pool sized for this call, against one deadline of `timeout` seconds
+    from the start of the call, so the total time does not grow with
+    the number of nodes. Fetches still running at the deadline are
+    reported as timeouts and left to finish on their own threads.
+
+    Args:
+        panels: FLEET_PANELS (instant queries aggregated by instance)
+        nodes: FLEET_NODES, dicts with 'name' and optional 'url'/'instance'
+        timeout: Deadline in seconds for the whole call
+
+    Returns:
+        dict: 'columns', 'nodes' (one row per node) and 'elapsed_ms'
+    """
+    started = time.perf_counter()
+    deadline = started + timeout
+    agents = [node for node in nodes if node.get('url')]
+
+    executor = ThreadPoolExecutor(max_workers=len(agents) + 1, thread_name_prefix='fleet')
+    try:
+        # The copied context carries the app context the Prometheus helpers need
+        prometheus = executor.submit(contextvars.copy_context().run, _prometheus_rows, panels, nodes)
+        futures = {executor.submit(_fetch_agent, node, timeout): node for node in agents}
+        wait([prometheus, *futures], timeout=max(0, deadline - time.perf_counter()))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    rows = {}
+    if not prometheus.done():
+        logger.warning(f"Fleet metrics query did not finish within {timeout}s")
+    elif prometheus.exception() is not None:
+        logger.error(f"Error querying fleet metrics: {prometheus.exception()}")
+    else:
+        rows = prometheus.result()
+
+    by_name = {row['name']: row for row in rows.values()}
+    for future, node in futures.items():
+        if future.done() and not future.cancelled() and future.exception() is None:
+            row = future.result()
+        else:
+            row = _empty_row(node['name'], 'agent')
+            row['up'] = False
+            row['error'] = 'timeout'
+            if future.done() and not future.cancelled():
+                # A malformed snapshot fails only its own node
+                logger.error(f"Error fetching fleet node {node['name']}: {future.exception()!r}")
+                row['error'] = str(future.exception()) or future.exception().__class__.__name__
+        _merge(by_name, row)
+
+    # Configured nodes that no source reported on still get a row
+    for node in nodes:
+        if node['name'] not in by_name:
+            row = _empty_row(node['name'], 'none')
+            row['error'] = 'no data'
+            by_name[node['name']] = row
+
+    return {
+        'columns': list(SUMMARY_COLUMNS),
+        'nodes': sorted(by_name.values(), key=lambda r: r['name']),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+def _merge(by_name, agent_row):
+    """Fill gaps in a Prometheus row with the agent snapshot for the same node"""
+    existing = by_name.get(agent_row['name'])
+    if existing is None:
+        by_name[agent_row['name']] = agent_row
+        return
+
+    existing['source'] = 'prometheus+agent'
+    for key, value in agent_row.items():
+        if key in ('name', 'source'):
+            continue
+        if existing.get(key) is None:
+            existing[key] = value
@@ -0,0 +1,111 @@
+"""
+Panel query planner
+Combines the PromQL of dashboard panels into as few Prometheus requests
+as possible and splits the results back out per panel
+"""
+
+import logging
+from utils.prometheus import query_prometheus, query_prometheus_range
+
+logger = logging.getLogger(__name__)
+
+# Label added to every series so batched results can be split per panel
+PANEL_LABEL = 'vps_panel'
+
+DEFAULT_DURATION = 600
+DEFAULT_STEP = 30
+
+def _batch_key(panel):
+    """Panels sharing a key can be answered by a single request"""
+    if panel.get('batch', True) is False:
+        return ('solo', panel['name'])
+    if panel.get('range'):
+        return ('range', panel.get('duration', DEFAULT_DURATION), panel.get('step', DEFAULT_STEP))
+    return ('instant',)
+
+def plan_queries(panels):
+    """
+    Group panels into batched PromQL requests
+
+    Each panel's query is tagged with a constant label via label_replace
+    and the tagged queries are joined with `or`. Because the tag differs
+    per panel, `or` keeps every series from every side.
+
+    Args:
+        panels: List of panel dicts with 'name', 'query' and optional
+            'range', 'duration', 'step' and 'batch' keys
+
+    Returns:
+        list: Batches as dicts with 'query', 'range', 'duration', 'step'
+            and 'panels' (the panel names answered by the batch)
+    """
+    batches = {}
+    for panel in panels:
+        if not panel.get('query'):
+            continue
+        key = _batch_key(panel)
+        batch = batches.setdefault(key, {
+            'range': bool(panel.get('range')),
+            'duration': panel.get('duration', DEFAULT_DURATION),
+            'step': panel.get('step', DEFAULT_STEP),
+            'panels': [],
+            'parts': []
+        })
+        batch['panels'].append(panel['name'])
+        batch['parts'].append(
+            f'label_replace({panel["query"]}, "{PANEL_LABEL}", "{panel["name"]}", "", "")'
+        )
+
+    plan = []
+    for batch in batches.values():
+        batch['query'] = ' or '.join(batch.pop('parts'))
+        plan.append(batch)
+    return plan
+
+def execute_plan(plan):
+    """
+    Run batched queries and split the results per panel
+
+    Args:
+        plan: Output of plan_queries
+
+    Returns:
+        dict: Panel name to Prometheus 'data' payload, or None for panels
+            whose batch failed
+    """
+    results = {}
+    for batch in plan:
+        if batch['range']:
+            data = query_prometheus_range(batch['query'], batch['duration'], batch['step'])
+        else:
+            data = query_prometheus(batch['query'])
+
+        if data is None:
+            logger.warning(f"Batched query failed for panels: {', '.join(batch['panels'])}")
+            for name in batch['panels']:
+                results[name] = None
+            continue
+
+        split = {name: [] for name in batch['panels']}
+        for series in data.get('result', []):
+            metric = series.get('metric', {})
+            name = metric.pop(PANEL_LABEL, None)
+            if name in split:
+                split[name].append(series)
+
+        for name, series_list in split.items():
+            results[name] = {'resultType': data.get('resultType'), 'result': series_list}
+
+    return results
+
+def query_panels(panels):
+    """
+    Fetch data for a set of panels with batched requests
+
+    Args:
+        panels: List of panel dicts (see plan_queries)
+
+    Returns:
+        dict: Panel name to Prometheus 'data' payload or None
+    """
+    return execute_plan(plan_queries(panels))
@@ -0,0 +1,245 @@
+"""
+Top-processes sampler
+Incremental per-PID tracking so CPU and I/O usage come from deltas
+between samples instead of blocking measurement intervals
+"""
+
+import os
+import time
+import heapq
+import threading
+import logging
+from operator import attrgetter
+
+import psutil
+from flask import current_app
+
+from utils.background import start_leader_task, write_json_state, read_json_state
+from utils.profiling import traced
+
+logger = logging.getLogger(__name__)
+
+class _ProcessEntry:
+    """Cached psutil.Process handle plus the counters from its last sample"""
+
+    __slots__ = ('proc', 'pid', 'name', 'cpu_total', 'io_total', 'rss',
+                 'cpu_percent', 'io_rate', 'primed')
+
+    def __init__(self, proc):
+        self.proc = proc
+        self.pid = proc.pid
+        self.name = ''
+        self.cpu_total = 0.0
+        self.io_total = None
+        self.rss = 0
+        self.cpu_percent = 0.0
+        self.io_rate = 0.0
+        self.primed = False
+
+    def update(self, name, cpu_total, rss, io_total, dt):
+        if self.primed and dt > 0 and cpu_total >= self.cpu_total:
+            self.cpu_percent = (cpu_total - self.cpu_total) / dt * 100
+            if io_total is not None and self.io_total is not None:
+                self.io_rate = max(io_total - self.io_total, 0) / dt
+        else:
+            # First sight, or counters went backwards because the PID was reused
+            self.cpu_percent = 0.0
+            self.io_rate = 0.0
+
+        self.name = name
+        self.cpu_total = cpu_total
+        self.rss = rss
+        self.io_total = io_total
+        self.primed = True
+
+    def to_dict(self):
+        return {
+            'pid': self.pid,
+            'name': self.name,
+            'cpu_percent': round(self.cpu_percent, 1),
+            'rss': self.rss,
+            'io_bytes_per_sec': round(self.io_rate, 1)
+        }
+
+class ProcessSampler:
+    """
+    Tracks every process between samples
+
+    Process handles are kept across samples, and each process is read
+    inside oneshot() so its /proc files are parsed once per sample.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.last_sample = None
+
+    @traced('psutil.processes')
+    def sample(self, min_interval=0.0):
+        """
+        Refresh per-process counters
+
+        Args:
+            min_interval: Skip the sample if the previous one is newer than this
+
+        Returns:
+            ProcessSampler: self, for chaining
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.last_sample is not None and now - self.last_sample < min_interval:
+                return self
+
+            dt = now - self.last_sample if self.last_sample is not None else 0.0
+            self.last_sample = now
+
+            entries = self._entries
+            alive = set()
+            for pid in psutil.pids():
+                entry = entries.get(pid)
+                if entry is None:
+                    try:
+                        entry = entries[pid] = _ProcessEntry(psutil.Process(pid))
+                    except psutil.Error:
+                        continue
+
+                if self._read(entry, dt):
+                    alive.add(pid)
+                else:
+                    entries.pop(pid, None)
+
+            for pid in [p for p in entries if p not in alive]:
+                del entries[pid]
+        return self
+
+    def _read(self, entry, dt):
+        proc = entry.proc
+        try:
+            with proc.oneshot():
+                cpu = proc.cpu_times()
+                rss = proc.memory_info().rss
+                name = proc.name()
+                try:
+                    io = proc.io_counters()
+                    io_total = io.read_bytes + io.write_bytes
+                except (psutil.AccessDenied, AttributeError):
+                    io_total = None
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return False
+        except psutil.AccessDenied:
+            return True
+
+        entry.update(name, cpu.user + cpu.system, rss, io_total, dt)
+        return True
+
+    def top(self, limit=10):
+        """
+        Top processes by CPU, resident memory and I/O
+
+        Args:
+            limit: Number of processes per list
+
+        Returns:
+            dict: 'cpu', 'memory' and 'io' lists plus the tracked 'count'
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+
+        return {
+            'cpu': [e.to_dict() for e in heapq.nlargest(limit, entries, key=attrgetter('cpu_percent'))],
+            'memory': [e.to_dict() for e in heapq.nlargest(limit, entries, key=attrgetter('rss'))],
+            'io': [e.to_dict() for e in heapq.nlargest(limit, entries, key=attrgetter('io_rate'))],
+            'count': len(entries)
+        }
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+def get_process_sampler():
+    """
+    Get the per-process sampler
+
+    Returns:
+        ProcessSampler: Shared sampler instance
+    """
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = ProcessSampler()
+    return _sampler
+
+def get_top_processes(limit=10, min_interval=2.0):
+    """
+    Sample (at most once per min_interval) and return the top processes
+
+    Args:
+        limit: Number of processes per list
+        min_interval: Minimum seconds between samples in this process
+
+    Returns:
+        dict: Top processes by CPU, memory and I/O
+    """
+    return get_process_sampler().sample(min_interval).top(limit)
+
+def init_processes(app):
+    """
+    Prime this worker's sampler and keep a shared top list fresh
+
+    The first sample only records counters, so it is taken at start-up
+    rather than by the first request. With PROCESS_SAMPLING_ENABLED the
+    elected worker samples every PROCESS_SAMPLE_INTERVAL seconds and
+    writes the top PROCESS_TOP_N of each list to RUNTIME_DIR/processes.json
+    for all workers.
+
+    Args:
+        app: Flask application
+    """
+    if 'processes' in app.extensions:
+        return
+
+    config = app.config
+    sampler = get_process_sampler()
+    app.extensions['processes'] = sampler
+    sampler.sample()
+
+    if not config.get('PROCESS_SAMPLING_ENABLED'):
+        return
+
+    path = os.path.join(config['RUNTIME_DIR'], 'processes.json')
+    limit = config['PROCESS_TOP_N']
+
+    def sample():
+        top = sampler.sample().top(limit)
+        try:
+            write_json_state(path, {'updated': time.time(), **top})
+        except OSError as e:
+            logger.error(f"Error writing process state: {e}")
+
+    start_leader_task(
+        app, 'process-sampler', config['PROCESS_SAMPLE_INTERVAL'], sample,
+        os.path.join(config['DATA_DIR'], '.processes.lock')
+    )
+
+def get_process_state(limit=10):
+    """
+    Top processes as last written by the sampler worker
+
+    Args:
+        limit: Number of processes per list, at most PROCESS_TOP_N
+
+    Returns:
+        dict: Top processes by CPU, memory and I/O, or None if background
+            sampling is off or its state is stale
+    """
+    config = current_app.config
+    if not config.get('PROCESS_SAMPLING_ENABLED'):
+        return None
+
+    state = read_json_state(os.path.join(config['RUNTIME_DIR'], 'processes.json'))
+    if not state or time.time() - state.get('updated', 0) > 3 * config['PROCESS_SAMPLE_INTERVAL'] + 5:
+        return None
+
+    for key in ('cpu', 'memory', 'io'):
+        state[key] = state.get(key, [])[:limit]
+    return state
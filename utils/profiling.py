@@ -0,0 +1,242 @@
+"""
+Request profiling
+Opt-in per-request span timing and sampling-profiler capture.
+
+When PROFILING_ENABLED is off no hooks are registered, and span() /
+traced() cost one ContextVar lookup and return a shared no-op.
+"""
+
+import os
+import sys
+import time
+import threading
+import logging
+import functools
+from collections import Counter
+from contextvars import ContextVar
+
+from flask import g, request, before_render_template, template_rendered
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+_current_trace = ContextVar('vps_trace', default=None)
+
+class _Trace:
+    __slots__ = ('spans', 'marks')
+
+    def __init__(self):
+        self.spans = []
+        self.marks = {}
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('trace', 'name', 'detail', 'started')
+
+    def __init__(self, trace, name, detail):
+        self.trace = trace
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.spans.append((self.name, self.detail, time.perf_counter() - self.started))
+        return False
+
+def span(name, detail=None):
+    """
+    Time a block as part of the current request's trace
+
+    Args:
+        name: Span name (e.g. 'prometheus.query')
+        detail: Optional description such as the PromQL; only stored,
+            never formatted, when tracing is active
+
+    Returns:
+        Context manager
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name, detail)
+
+def traced(name):
+    """Decorator form of span() for whole functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class StackSampler:
+    """
+    Samples one thread's Python stack on a timer
+
+    Stacks are aggregated in folded format ("outer;inner;leaf count"),
+    which flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.counts[';'.join(reversed(stack))] += 1
+            self._stop.wait(self.interval)
+
+def write_folded(counts, path):
+    """Write folded stacks, most frequent first"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+
+class _TracingJSONProvider(DefaultJSONProvider):
+    """Records JSON serialisation as a span"""
+
+    def dumps(self, obj, **kwargs):
+        with span('json.dumps'):
+            return super().dumps(obj, **kwargs)
+
+def _template_started(sender, template, context, **extra):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.marks[id(template)] = time.perf_counter()
+
+def _template_rendered(sender, template, context, **extra):
+    trace = _current_trace.get()
+    if trace is not None:
+        started = trace.marks.pop(id(template), None)
+        if started is not None:
+            trace.spans.append(('template.render', template.name, time.perf_counter() - started))
+
+def _server_timing(spans, total, with_detail=False):
+    entries = []
+    for name, detail, elapsed in spans:
+        entry = f"{name};dur={elapsed * 1000:.1f}"
+        if detail and with_detail:
+            desc = str(detail)[:100].replace('\\', '\\\\').replace('"', '\\"')
+            entry += f';desc="{desc}"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(entries)
+
+def init_profiling(app):
+    """
+    Register profiling hooks if PROFILING_ENABLED is set
+
+    Every request gets span timing and a Server-Timing header; span
+    details are only included on admin routes. Requests slower than
+    PROFILING_SLOW_MS are logged with their spans. A stack
+    profile is captured for admin requests with ?profile=1, or for every
+    request when PROFILING_SAMPLE_SLOW is set (kept only if slow), and
+    written to PROFILING_DIR as a .folded file.
+
+    Args:
+        app: Flask application
+    """
+    config = app.config
+    if not config.get('PROFILING_ENABLED'):
+        return
+
+    app.json = _TracingJSONProvider(app)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_rendered, app)
+
+    slow_seconds = config['PROFILING_SLOW_MS'] / 1000
+
+    @app.before_request
+    def _start_trace():
+        trace = _Trace()
+        g._profiling_token = _current_trace.set(trace)
+        g._profiling_started = time.perf_counter()
+
+        explicit = request.args.get('profile') == '1' and request.blueprint == 'admin'
+        g._profiling_explicit = explicit
+        g._profiling_sampler = None
+        if explicit or config['PROFILING_SAMPLE_SLOW']:
+            g._profiling_sampler = StackSampler(
+                threading.get_ident(), config['PROFILING_SAMPLE_INTERVAL']
+            ).start()
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = _current_trace.get()
+        if trace is None:
+            return response
+
+        total = time.perf_counter() - g._profiling_started
+        # Span details (PromQL, template names) are only shown on admin
+        # routes, which also covers ?profile=1; other clients get timings
+        response.headers['Server-Timing'] = _server_timing(
+            trace.spans, total, with_detail=request.blueprint == 'admin'
+        )
+
+        if total >= slow_seconds:
+            breakdown = ', '.join(
+                f"{name}{f' [{str(detail)[:60]}]' if detail else ''}={elapsed * 1000:.1f}ms"
+                for name, detail, elapsed in trace.spans
+            )
+            logger.warning(f"Slow request {request.method} {request.path}: {total * 1000:.0f}ms ({breakdown})")
+
+        sampler = g.pop('_profiling_sampler', None)
+        if sampler is not None:
+            counts = sampler.stop()
+            if g._profiling_explicit or total >= slow_seconds:
+                name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unknown'}-{total * 1000:.0f}ms.folded"
+                path = os.path.join(config['PROFILING_DIR'], name)
+                try:
+                    write_folded(counts, path)
+                    response.headers['X-Profile'] = name
+                    logger.info(f"Wrote profile {path}")
+                except OSError as e:
+                    logger.error(f"Error writing profile: {e}")
+
+        return response
+
+    @app.teardown_request
+    def _end_trace(exc):
+        sampler = g.pop('_profiling_sampler', None)
+        if sampler is not None:
+            sampler.stop()
+        token = g.pop('_profiling_token', None)
+        if token is not None:
+            _current_trace.reset(token)
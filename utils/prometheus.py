@@ -6,6 +6,7 @@ Helper functions for interacting with Prometheus
 import requests
 import logging
 from flask import current_app
+from utils.profiling import span
 from datetime import datetime
 import math
 
@@ -25,7 +26,8 @@ def query_prometheus(query):
         url = f"{current_app.config['PROMETHEUS_URL']}/api/v1/query"
         params = {'query': query}
         
-        response = requests.get(url, params=params, timeout=10)
+        with span('prometheus.query', query):
+            response = requests.get(url, params=params, timeout=10)
         
         if response.status_code != 200:
             logger.error(f"Prometheus query failed with status {response.status_code}")
@@ -70,7 +72,8 @@ def query_prometheus_range(query, duration_seconds=600, step=30):
             'step': step
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        with span('prometheus.query_range', query):
+            response = requests.get(url, params=params, timeout=10)
         
         if response.status_code != 200:
             logger.error(f"Prometheus range query failed with status {response.status_code}")
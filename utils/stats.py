@@ -0,0 +1,23 @@
+"""
+Statistics helpers
+Shared by the connectivity prober and the benchmark harness
+"""
+
+import math
+
+def percentile(sorted_values, pct, default=None):
+    """
+    Nearest-rank percentile
+
+    Args:
+        sorted_values: Values in ascending order
+        pct: Percentile between 0 and 100
+        default: Returned for an empty list
+
+    Returns:
+        float: The smallest value with at least pct% of values at or below it
+    """
+    if not sorted_values:
+        return default
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
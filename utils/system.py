@@ -6,9 +6,12 @@ Functions for getting system information
 import psutil
 import logging
 from datetime import datetime, timedelta
+from utils.profiling import span
 
 logger = logging.getLogger(__name__)
 
+GB = 1024 ** 3
+
 def get_system_info():
     """
     Get comprehensive system information
@@ -18,35 +21,39 @@ def get_system_info():
     """
     try:
         # CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        with span('psutil.cpu_percent'):
+            cpu_percent = psutil.cpu_percent(interval=1)
         cpu_count = psutil.cpu_count()
         
         # Memory usage
-        memory = psutil.virtual_memory()
+        with span('psutil.virtual_memory'):
+            memory = psutil.virtual_memory()
         memory_info = {
             'total': memory.total,
             'available': memory.available,
             'used': memory.used,
             'percent': memory.percent,
-            'total_gb': round(memory.total / (1024**3), 2),
-            'used_gb': round(memory.used / (1024**3), 2),
-            'available_gb': round(memory.available / (1024**3), 2)
+            'total_gb': round(memory.total / GB, 2),
+            'used_gb': round(memory.used / GB, 2),
+            'available_gb': round(memory.available / GB, 2)
         }
         
         # Disk usage
-        disk = psutil.disk_usage('/')
+        with span('psutil.disk_usage'):
+            disk = psutil.disk_usage('/')
         disk_info = {
             'total': disk.total,
             'used': disk.used,
             'free': disk.free,
             'percent': disk.percent,
-            'total_gb': round(disk.total / (1024**3), 2),
-            'used_gb': round(disk.used / (1024**3), 2),
-            'free_gb': round(disk.free / (1024**3), 2)
+            'total_gb': round(disk.total / GB, 2),
+            'used_gb': round(disk.used / GB, 2),
+            'free_gb': round(disk.free / GB, 2)
         }
         
         # Network I/O
-        net_io = psutil.net_io_counters()
+        with span('psutil.net_io_counters'):
+            net_io = psutil.net_io_counters()
         network_info = {
             'bytes_sent': net_io.bytes_sent,
             'bytes_recv': net_io.bytes_recv,
@@ -75,7 +82,8 @@ def get_system_info():
             uptime_short = uptime_str
         
         # Process count
-        process_count = len(psutil.pids())
+        with span('psutil.pids'):
+            process_count = len(psutil.pids())
         
         return {
             'cpu': {
@@ -0,0 +1,37 @@
+"""
+Telegram utilities
+Send messages through the bot configured via Docker secrets
+"""
+
+import requests
+import logging
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+def send_telegram_message(text):
+    """
+    Send a message to the configured Telegram user
+
+    Args:
+        text: Message text
+
+    Returns:
+        requests.Response: Telegram API response
+
+    Raises:
+        FileNotFoundError: If the bot token or user ID secret is missing
+        requests.RequestException: On connection errors
+    """
+    with open(current_app.config['TELEGRAM_BOT_TOKEN_FILE'], 'r') as f:
+        bot_token = f.read().strip()
+    with open(current_app.config['TELEGRAM_USER_ID_FILE'], 'r') as f:
+        chat_id = f.read().strip()
+
+    telegram_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    telegram_data = {
+        'chat_id': chat_id,
+        'text': text
+    }
+
+    return requests.post(telegram_url, json=telegram_data, timeout=10)
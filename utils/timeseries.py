@@ -0,0 +1,477 @@
+"""
+Local time-series storage
+Append-only, compressed segment files for host metrics sampled with psutil.
+Used by the admin dashboard when Prometheus is unavailable.
+
+File layout (one file per segment, named seg-<start>.tsd):
+    header:  b'VPSTS1' | u16 length | comma-separated field names
+    blocks:  b'BLK1' | u32 count | f64 t_min | f64 t_max | u32 length | payload
+    payload: zlib(timestamps column + one column per field, little-endian f64)
+
+Blocks are only ever appended, so readers can mmap a segment while the
+writer extends it and simply stop at a torn trailing block.
+"""
+
+import os
+import math
+import bisect
+import mmap
+import time
+import zlib
+import struct
+import threading
+import logging
+
+import psutil
+from flask import current_app
+
+from utils.background import start_leader_task
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('cpu_percent', 'memory_percent', 'disk_percent', 'net_bytes_per_sec')
+
+FILE_MAGIC = b'VPSTS1'
+BLOCK_MAGIC = b'BLK1'
+FILE_HEADER = struct.Struct('<6sH')
+BLOCK_HEADER = struct.Struct('<4sIddI')
+
+SEGMENT_SUFFIX = '.tsd'
+DOWNSAMPLED_SUFFIX = '.ds.tsd'
+
+class SegmentStore:
+    """
+    On-disk store of fixed-schema metric samples
+
+    Samples are buffered in memory and written as one compressed block per
+    flush, so the disk sees a single small append every flush_samples
+    samples. Sealed segments are downsampled once and then deleted when
+    they fall out of the retention window.
+    """
+
+    def __init__(self, directory, fields=FIELDS, segment_seconds=3600,
+                 flush_samples=6, retention_seconds=7 * 86400,
+                 downsample_after=86400, downsample_step=300):
+        self.directory = directory
+        self.fields = tuple(fields)
+        self.segment_seconds = segment_seconds
+        self.flush_samples = flush_samples
+        self.retention_seconds = retention_seconds
+        self.downsample_after = downsample_after
+        self.downsample_step = downsample_step
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._active_path = None
+        self._active_start = None
+
+    def append(self, timestamp, values):
+        """
+        Buffer one sample, flushing a block when the buffer is full
+
+        Args:
+            timestamp: Sample time in seconds since epoch
+            values: Dict of field name to float (missing fields become NaN)
+        """
+        row = (float(timestamp),) + tuple(
+            float(values.get(field, math.nan)) for field in self.fields
+        )
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.flush_samples:
+                self._flush_locked()
+
+    def flush(self):
+        """Write any buffered samples to disk"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+
+        rows = self._buffer
+        self._buffer = []
+        first_ts = rows[0][0]
+
+        if self._active_path is None or first_ts - self._active_start >= self.segment_seconds:
+            # A fresh segment per writer start avoids appending after a torn block
+            os.makedirs(self.directory, exist_ok=True)
+            self._active_start = int(first_ts)
+            self._active_path = os.path.join(
+                self.directory, f"seg-{self._active_start:010d}{SEGMENT_SUFFIX}"
+            )
+
+        try:
+            with open(self._active_path, 'ab') as f:
+                if f.tell() == 0:
+                    f.write(_encode_file_header(self.fields))
+                f.write(_encode_block(rows, len(self.fields)))
+        except OSError as e:
+            logger.error(f"Error writing time-series block: {e}")
+
+    def query(self, start, end):
+        """
+        Read samples in [start, end] from disk and the write buffer
+
+        Args:
+            start: Range start in seconds since epoch
+            end: Range end in seconds since epoch
+
+        Returns:
+            list: Rows of (timestamp, *values) in store field order
+        """
+        rows = []
+        for seg_start, seg_end, path in self._segment_ranges():
+            if seg_start > end:
+                break
+            if seg_end < start:
+                continue
+            try:
+                rows.extend(_read_segment(path, start, end, self.fields))
+            except (OSError, ValueError, zlib.error) as e:
+                logger.error(f"Error reading segment {path}: {e}")
+
+        with self._lock:
+            rows.extend(r for r in self._buffer if start <= r[0] <= end)
+
+        rows.sort(key=lambda r: r[0])
+        return rows
+
+    def compact(self, now=None):
+        """
+        Apply retention: delete expired segments, downsample old ones
+
+        Each segment is rewritten at most once (when it is downsampled),
+        which keeps write amplification close to 1x.
+
+        Args:
+            now: Current time in seconds since epoch (defaults to time.time())
+        """
+        now = now or time.time()
+        active = self._active_path
+        self._remove_stale_tmp()
+
+        for seg_start, seg_end, path in self._segment_ranges():
+            if path == active:
+                continue
+            try:
+                if seg_end < now - self.retention_seconds:
+                    os.remove(path)
+                elif seg_end < now - self.downsample_after and not path.endswith(DOWNSAMPLED_SUFFIX):
+                    self._downsample(seg_start, path)
+            except (OSError, ValueError, zlib.error) as e:
+                logger.error(f"Error compacting segment {path}: {e}")
+
+    def _downsample(self, seg_start, path):
+        rows = _read_segment(path, -math.inf, math.inf, self.fields)
+        buckets = {}
+        for row in rows:
+            buckets.setdefault(int(row[0] // self.downsample_step), []).append(row)
+
+        merged = []
+        for key in sorted(buckets):
+            group = buckets[key]
+            merged.append(tuple(_mean(col) for col in zip(*group)))
+
+        target = os.path.join(self.directory, f"seg-{seg_start:010d}{DOWNSAMPLED_SUFFIX}")
+        tmp = target + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_encode_file_header(self.fields))
+            if merged:
+                f.write(_encode_block(merged, len(self.fields)))
+        os.replace(tmp, target)
+        os.remove(path)
+
+    def _segment_ranges(self):
+        """
+        Segments with the time range they can hold
+
+        A segment is named after its first sample and keeps receiving
+        blocks until the writer starts the next one, which can be past
+        segment_seconds. Its end is therefore the next segment's start,
+        or its last block's t_max for the newest segment.
+        """
+        segments = self._segments()
+        starts = sorted({seg_start for seg_start, _ in segments})
+        ranges = []
+        for seg_start, path in segments:
+            later = bisect.bisect_right(starts, seg_start)
+            if later < len(starts):
+                seg_end = starts[later]
+            else:
+                try:
+                    seg_end = _last_timestamp(path)
+                except (OSError, ValueError):
+                    seg_end = math.inf
+            ranges.append((seg_start, seg_end, path))
+        return ranges
+
+    def _remove_stale_tmp(self):
+        """Delete temporary files left behind by an interrupted downsample"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.startswith('seg-') and name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError as e:
+                    logger.error(f"Error removing {name}: {e}")
+
+    def _segments(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        segments = []
+        for name in names:
+            if not name.startswith('seg-') or not name.endswith(SEGMENT_SUFFIX):
+                continue
+            try:
+                seg_start = int(name[4:].split('.', 1)[0])
+            except ValueError:
+                continue
+            segments.append((seg_start, os.path.join(self.directory, name)))
+
+        segments.sort()
+        return segments
+
+def _mean(values):
+    finite = [v for v in values if not math.isnan(v)]
+    return sum(finite) / len(finite) if finite else math.nan
+
+def _encode_file_header(fields):
+    names = ','.join(fields).encode()
+    return FILE_HEADER.pack(FILE_MAGIC, len(names)) + names
+
+def _encode_block(rows, width):
+    if len(rows[0]) != width + 1:
+        raise ValueError("Row width does not match segment schema")
+    count = len(rows)
+    column = struct.Struct(f'<{count}d')
+    payload = b''.join(column.pack(*col) for col in zip(*rows))
+    compressed = zlib.compress(payload, 6)
+    t_min = min(r[0] for r in rows)
+    t_max = max(r[0] for r in rows)
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, count, t_min, t_max, len(compressed)) + compressed
+
+def _last_timestamp(path):
+    """Largest t_max across a segment's complete blocks (headers only)"""
+    last = -math.inf
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            return last
+        magic, names_len = FILE_HEADER.unpack(header)
+        if magic != FILE_MAGIC:
+            raise ValueError("Not a time-series segment")
+
+        offset = FILE_HEADER.size + names_len
+        while offset + BLOCK_HEADER.size <= size:
+            f.seek(offset)
+            magic, count, t_min, t_max, length = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+            offset += BLOCK_HEADER.size + length
+            if magic != BLOCK_MAGIC or offset > size:
+                break
+            last = max(last, t_max)
+    return last
+
+def _read_segment(path, start, end, fields):
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < FILE_HEADER.size:
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, names_len = FILE_HEADER.unpack_from(mm, 0)
+            if magic != FILE_MAGIC:
+                raise ValueError("Not a time-series segment")
+            offset = FILE_HEADER.size + names_len
+            seg_fields = mm[FILE_HEADER.size:offset].decode().split(',')
+
+            # Map the segment schema onto the store schema by field name
+            index = [seg_fields.index(f) + 1 if f in seg_fields else None for f in fields]
+            width = len(seg_fields) + 1
+
+            rows = []
+            while offset + BLOCK_HEADER.size <= size:
+                magic, count, t_min, t_max, length = BLOCK_HEADER.unpack_from(mm, offset)
+                if magic != BLOCK_MAGIC:
+                    break
+                payload_start = offset + BLOCK_HEADER.size
+                offset = payload_start + length
+                if offset > size:
+                    break  # Torn trailing block from an interrupted write
+                if t_max < start or t_min > end:
+                    continue
+
+                raw = zlib.decompress(mm[payload_start:offset])
+                columns = [struct.unpack_from(f'<{count}d', raw, i * count * 8) for i in range(width)]
+                for i, ts in enumerate(columns[0]):
+                    if start <= ts <= end:
+                        rows.append((ts,) + tuple(
+                            columns[j][i] if j is not None else math.nan for j in index
+                        ))
+            return rows
+
+class HostSampler:
+    """Non-blocking psutil sampler for the store's fields"""
+
+    def __init__(self):
+        self._net_totals = None
+        self._net_time = None
+        psutil.cpu_percent(interval=None)  # Prime the CPU counter
+
+    def _network_rate(self, now):
+        """Transmit + receive bytes/s across non-loopback interfaces"""
+        try:
+            counters = psutil.net_io_counters(pernic=True)
+        except Exception as e:
+            logger.error(f"Error reading network counters: {e}")
+            return math.nan
+
+        totals = {
+            name: c.bytes_sent + c.bytes_recv
+            for name, c in counters.items() if name != 'lo'
+        }
+        previous, dt = self._net_totals, now - (self._net_time or now)
+        self._net_totals, self._net_time = totals, now
+        if previous is None or dt <= 0:
+            return math.nan
+
+        # Interfaces that appeared or reset their counters contribute zero
+        return sum(
+            max(total - previous[name], 0) for name, total in totals.items() if name in previous
+        ) / dt
+
+    def __call__(self):
+        now = time.monotonic()
+        return time.time(), {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': psutil.virtual_memory().percent,
+            'disk_percent': psutil.disk_usage('/').percent,
+            'net_bytes_per_sec': self._network_rate(now)
+        }
+
+def init_timeseries(app):
+    """
+    Create the local store and start the sampler in the elected worker
+
+    Args:
+        app: Flask application
+    """
+    if 'timeseries' in app.extensions:
+        return
+
+    config = app.config
+    store = SegmentStore(
+        config['TIMESERIES_DIR'],
+        segment_seconds=config['TIMESERIES_SEGMENT_SECONDS'],
+        flush_samples=config['TIMESERIES_FLUSH_SAMPLES'],
+        retention_seconds=config['TIMESERIES_RETENTION_SECONDS'],
+        downsample_after=config['TIMESERIES_DOWNSAMPLE_AFTER'],
+        downsample_step=config['TIMESERIES_DOWNSAMPLE_STEP']
+    )
+    app.extensions['timeseries'] = store
+    listeners = app.extensions.setdefault('timeseries_listeners', [])
+
+    if not config.get('TIMESERIES_ENABLED'):
+        return
+
+    sampler = HostSampler()
+    last_compact = [0.0]
+
+    def sample():
+        timestamp, values = sampler()
+        store.append(timestamp, values)
+        for listener in listeners:
+            try:
+                listener(timestamp, values)
+            except Exception as e:
+                logger.error(f"Sample listener failed: {e}")
+        if timestamp - last_compact[0] >= 3600:
+            store.compact(timestamp)
+            last_compact[0] = timestamp
+
+    start_leader_task(
+        app, 'timeseries-sampler', config['TIMESERIES_SAMPLE_INTERVAL'], sample,
+        os.path.join(config['TIMESERIES_DIR'], '.writer.lock')
+    )
+
+def add_sample_listener(app, listener):
+    """
+    Call listener(timestamp, values) after every local sample
+
+    Listeners run in the elected sampler worker only, inside the app context.
+
+    Args:
+        app: Flask application
+        listener: Callable taking the sample time and the values dict
+    """
+    app.extensions.setdefault('timeseries_listeners', []).append(listener)
+
+def get_store():
+    """
+    Get the local store for the current app
+
+    Returns:
+        SegmentStore: Store instance or None if not initialised
+    """
+    return current_app.extensions.get('timeseries')
+
+def local_query_range(field, duration_seconds=600, step=30):
+    """
+    Range query against the local store, shaped like a Prometheus matrix
+
+    Args:
+        field: Field name from FIELDS
+        duration_seconds: How far back to query (default 10 minutes)
+        step: Resolution in seconds; the last sample in each step wins
+
+    Returns:
+        dict: Prometheus-style 'data' payload or None if no samples
+    """
+    store = get_store()
+    if store is None or field not in store.fields:
+        return None
+
+    end = time.time()
+    index = store.fields.index(field) + 1
+    buckets = {}
+    for row in store.query(end - duration_seconds, end):
+        if not math.isnan(row[index]):
+            buckets[int(row[0] // step)] = row
+
+    if not buckets:
+        return None
+
+    values = [[buckets[k][0], str(buckets[k][index])] for k in sorted(buckets)]
+    return {
+        'resultType': 'matrix',
+        'result': [{'metric': {'source': 'local'}, 'values': values}]
+    }
+
+def local_query(field, max_age_seconds=300):
+    """
+    Latest value from the local store, shaped like a Prometheus vector
+
+    Args:
+        field: Field name from FIELDS
+        max_age_seconds: Ignore samples older than this
+
+    Returns:
+        dict: Prometheus-style 'data' payload or None if no recent sample
+    """
+    data = local_query_range(field, duration_seconds=max_age_seconds, step=1)
+    if not data:
+        return None
+
+    latest = data['result'][0]['values'][-1]
+    return {
+        'resultType': 'vector',
+        'result': [{'metric': {'source': 'local'}, 'value': latest}]
+    }
@@ -8,6 +8,33 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Basic email regex pattern
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Characters escaped by sanitize_input. Chained str.replace is kept on
+# purpose: each call is a C-level scan that returns the original string
+# untouched when the character is absent, and on 5000-character inputs it
+# beats both str.translate and a single re.sub pass (see tests/benchmarks).
+ESCAPES = (
+    ('<', '&lt;'),
+    ('>', '&gt;'),
+    ('"', '&quot;'),
+    ("'", '&#x27;'),
+    ('/', '&#x2F;')
+)
+
+# Potential spam patterns: (name, required literal, pattern, score).
+# The literal is checked with a substring search on the lowercased message
+# first, so the regex only runs for rules that can possibly match. Only ASCII
+# messages are prefiltered: (?i) also folds non-ASCII variants such as 'ı'
+# and 'ſ' that str.lower() leaves alone.
+SPAM_RULES = [
+    ('viagra', 'viagra', re.compile(r'(?i)viagra'), 3),
+    ('casino', 'casino', re.compile(r'(?i)casino'), 2),
+    ('winner_prize', 'winner', re.compile(r'(?i)winner.*prize'), 2),
+    ('click_here_now', 'click', re.compile(r'(?i)click.*here.*now'), 1)
+]
+
 def validate_email(email):
     """
     Validate email address format
@@ -21,10 +48,7 @@ def validate_email(email):
     if not email:
         return True  # Email is optional
     
-    # Basic email regex pattern
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
-    return bool(re.match(pattern, email))
+    return EMAIL_PATTERN.match(email) is not None
 
 def validate_message(message):
     """
@@ -36,27 +60,47 @@ def validate_message(message):
     Returns:
         tuple: (is_valid, error_message)
     """
+    error = _message_error(message)
+    if error:
+        return False, error
+    
+    # Check for potential spam patterns
+    score, matched = spam_score(message)
+    if matched:
+        # Flag but do not reject
+        logger.warning(f"Potential spam detected (score {score}): {', '.join(matched)}")
+    
+    return True, None
+
+def _message_error(message):
+    """Empty and length checks shared by validate_message and _check_form"""
     if not message or not message.strip():
-        return False, "Message cannot be empty"
+        return "Message cannot be empty"
     
     if len(message) > 5000:
-        return False, "Message is too long (max 5000 characters)"
+        return "Message is too long (max 5000 characters)"
     
-    # Check for potential spam patterns
-    spam_patterns = [
-        r'(?i)viagra',
-        r'(?i)casino',
-        r'(?i)winner.*prize',
-        r'(?i)click.*here.*now'
-    ]
-    
-    for pattern in spam_patterns:
-        if re.search(pattern, message):
-            logger.warning(f"Potential spam detected: {pattern}")
-            # You might want to flag but not reject
-            pass
+    return None
+
+def spam_score(message):
+    """
+    Score a message against SPAM_RULES
     
-    return True, None
+    Args:
+        message: Message string
+    
+    Returns:
+        tuple: (score, matched rule names)
+    """
+    lowered = message.lower() if message.isascii() else None
+    score = 0
+    matched = []
+    for name, literal, pattern, rule_score in SPAM_RULES:
+        if (lowered is None or literal in lowered) and pattern.search(message):
+            score += rule_score
+            matched.append(name)
+    
+    return score, matched
 
 def sanitize_input(text):
     """
@@ -72,30 +116,20 @@ def sanitize_input(text):
         return ""
     
     # Remove or escape potentially dangerous characters
-    replacements = {
-        '<': '&lt;',
-        '>': '&gt;',
-        '"': '&quot;',
-        "'": '&#x27;',
-        '/': '&#x2F;'
-    }
-    
-    for char, replacement in replacements.items():
+    for char, replacement in ESCAPES:
         text = text.replace(char, replacement)
     
     return text.strip()
 
-def validate_contact_form(form_data):
+def _check_form(form_data):
     """
-    Validate entire contact form
-    
-    Args:
-        form_data: Dictionary of form fields
+    Field checks shared by single and batch validation (no logging)
     
     Returns:
-        tuple: (is_valid, errors_dict)
+        tuple: (errors_dict, (spam score, matched rule names))
     """
     errors = {}
+    spam = (0, [])
     
     # Validate name (optional)
     name = form_data.get('name', '').strip()
@@ -104,13 +138,57 @@ def validate_contact_form(form_data):
     
     # Validate email
     email = form_data.get('email', '').strip()
-    if email and not validate_email(email):
+    if email and EMAIL_PATTERN.match(email) is None:
         errors['email'] = "Invalid email address"
     
     # Validate message
     message = form_data.get('message', '').strip()
-    is_valid, error_msg = validate_message(message)
-    if not is_valid:
-        errors['message'] = error_msg
+    error = _message_error(message)
+    if error:
+        errors['message'] = error
+    else:
+        spam = spam_score(message)
+    
+    return errors, spam
+
+def validate_contact_form(form_data):
+    """
+    Validate entire contact form
+    
+    Args:
+        form_data: Dictionary of form fields
+    
+    Returns:
+        tuple: (is_valid, errors_dict)
+    """
+    errors, (score, matched) = _check_form(form_data)
+    if matched:
+        # Flag but do not reject
+        logger.warning(f"Potential spam detected (score {score}): {', '.join(matched)}")
     
     return len(errors) == 0, errors
+
+def validate_contact_forms(forms):
+    """
+    Validate a batch of queued contact form submissions
+    
+    Spam is scored per form but logged once for the whole batch.
+    
+    Args:
+        forms: Iterable of form data dictionaries
+    
+    Returns:
+        list: (is_valid, errors_dict, spam_score) for each form, in order
+    """
+    results = []
+    flagged = 0
+    for form_data in forms:
+        errors, (score, matched) = _check_form(form_data)
+        if matched:
+            flagged += 1
+        results.append((len(errors) == 0, errors, score))
+    
+    if flagged:
+        logger.warning(f"Potential spam detected in {flagged} of {len(results)} submissions")
+    
+    return results